@@ -253,3 +253,99 @@ class CCDParser:
                 allergies.append(allergy)
         
         return allergies
+    
+    def extract_lab_results(self) -> List[Dict[str, Any]]:
+        """
+        Extract laboratory result observations from CCD.
+        
+        Returns:
+            List[Dict[str, Any]]: List of lab results
+        """
+        # Results section (LOINC code 30954-2)
+        return self._extract_result_observations('30954-2')
+    
+    def extract_vital_signs(self) -> List[Dict[str, Any]]:
+        """
+        Extract vital sign observations from CCD.
+        
+        Returns:
+            List[Dict[str, Any]]: List of vital signs
+        """
+        # Vital signs section (LOINC code 8716-3)
+        return self._extract_result_observations('8716-3')
+    
+    def _extract_result_observations(self, section_code: str) -> List[Dict[str, Any]]:
+        """
+        Extract coded, measured observations from a results-style section.
+        
+        Args:
+            section_code (str): LOINC code of the section
+            
+        Returns:
+            List[Dict[str, Any]]: List of observations
+        """
+        results = []
+        
+        observations = self.xpath_query(
+            f"//cda:section[cda:code/@code='{section_code}']//cda:observation"
+        )
+        
+        for observation in observations:
+            result = {}
+            
+            # Test / vital sign name and LOINC code
+            name = observation.xpath("./cda:code/@displayName", namespaces=self.namespaces)
+            if name:
+                result['name'] = name[0]
+            
+            code = observation.xpath("./cda:code/@code", namespaces=self.namespaces)
+            if code:
+                result['code'] = code[0]
+            
+            # Measurement value and unit
+            value = observation.xpath("./cda:value/@value", namespaces=self.namespaces)
+            if value:
+                result['value'] = value[0]
+            
+            unit = observation.xpath("./cda:value/@unit", namespaces=self.namespaces)
+            if unit:
+                result['unit'] = unit[0]
+            
+            # Reference range
+            low = observation.xpath("./cda:referenceRange/cda:observationRange/cda:value/cda:low/@value", namespaces=self.namespaces)
+            if low:
+                result['range_low'] = low[0]
+            
+            high = observation.xpath("./cda:referenceRange/cda:observationRange/cda:value/cda:high/@value", namespaces=self.namespaces)
+            if high:
+                result['range_high'] = high[0]
+            
+            # H/L/N interpretation
+            interpretation = observation.xpath("./cda:interpretationCode/@code", namespaces=self.namespaces)
+            if interpretation:
+                result['interpretation'] = interpretation[0]
+            
+            # Result date
+            effective_time = observation.xpath("./cda:effectiveTime/@value", namespaces=self.namespaces)
+            if effective_time:
+                result['date'] = self._format_hl7_date(effective_time[0])
+            
+            if result:  # Only add if we found some data
+                results.append(result)
+        
+        return results
+    
+    def _format_hl7_date(self, hl7_date: str) -> str:
+        """
+        Format an HL7 date/timestamp (YYYYMMDD[HHMM[SS]]) as YYYY-MM-DD.
+        
+        Args:
+            hl7_date (str): HL7 TS value, e.g. '20240815143000'
+            
+        Returns:
+            str: ISO formatted date, or the original value if it cannot be parsed
+        """
+        try:
+            return datetime.strptime(str(hl7_date)[:8], '%Y%m%d').strftime('%Y-%m-%d')
+        except ValueError:
+            return str(hl7_date)
@@ -18,11 +18,381 @@ Author: [Your Name]
 Created during Health Informatics Internship at MIHIN
 """
 
+import codecs
+import re
 import hl7
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
+
+
+# HL7 Table 0211 character set names (MSH-18) -> Python codec names
+HL7_CHARSETS = {
+    'ASCII': 'ascii',
+    '8859/1': 'latin-1',
+    '8859/2': 'iso8859-2',
+    '8859/3': 'iso8859-3',
+    '8859/4': 'iso8859-4',
+    '8859/5': 'iso8859-5',
+    '8859/6': 'iso8859-6',
+    '8859/7': 'iso8859-7',
+    '8859/8': 'iso8859-8',
+    '8859/9': 'iso8859-9',
+    '8859/15': 'iso8859-15',
+    'UNICODE UTF-8': 'utf-8',
+    'UNICODE': 'utf-8',
+    'ISO IR6': 'ascii',
+    'ISO IR100': 'latin-1',
+    'ISO IR192': 'utf-8',
+    'GB 18030-2000': 'gb18030',
+    'KS X 1001': 'euc-kr',
+    'BIG-5': 'big5',
+    'CNS 11643-1992': 'big5'
+}
+
+# Segment terminators (HL7 requires CR; files often carry LF or CRLF)
+_SEGMENT_SPLIT_STR = re.compile(r'\r\n|\r|\n')
+_SEGMENT_SPLIT_BYTES = re.compile(rb'\r\n|\r|\n')
+
+# Codecs in which every byte below 0x80 is always the ASCII character itself,
+# so bytes messages can be split before decoding. Messages in any other
+# declared charset (GBK, Shift_JIS, Big5, ISO-2022, ...) are decoded first,
+# since those can encode a character with a byte equal to an ASCII delimiter
+_ASCII_SAFE_CODECS = ('utf-8', 'ascii', 'latin-1', 'iso8859-', 'cp125', 'euc', 'koi8', 'mac-')
+
+# OBX subsegments extracted by check_obx_subsegments():
+# (result name, field index, component index)
+OBX_SUBSEGMENTS = (('OBX.23.1', 23, 0), ('OBX.15.1', 15, 0), ('OBX.15.2', 15, 1))
+
+
+def _segment_type(segment) -> str:
+    """Return the segment type (e.g. 'OBX') of a parsed segment."""
+    if hasattr(segment[0], 'value'):
+        return segment[0].value
+    return str(segment[0])
+
+
+def _new_obx_results() -> Dict[str, List[str]]:
+    """Create an empty OBX subsegment results dictionary."""
+    return {
+        'OBX.23.1': [],  # Local Process Control
+        'OBX.15.1': [],  # Producer's ID
+        'OBX.15.2': []   # Producer's Text
+    }
+
+
+class SplitMessage:
+    """
+    An HL7 V2 message split into segments and fields.
+
+    str messages are split into str fields and bytes messages into bytes
+    fields, so bytes are not decoded as a whole (unless MSH-18 declares a
+    charset whose bytes can equal an ASCII delimiter, such as GBK or
+    Shift_JIS); value() decodes (bytes only) and unescapes a single field
+    value. Both input types therefore go
+    through the same splitting and extraction rules.
+
+    Attributes:
+        segments (List[list]): Fields of each segment; fields[0] is the
+                               segment type. For MSH, fields[n - 1] is MSH-n
+                               because MSH-1 is the field separator itself.
+        segment_types (List[str]): Segment type of each segment
+        delimiters: Field separator followed by MSH-2, e.g. '|^~\\&'
+        charset (Optional[str]): Codec for the MSH-18 character set, or None
+                                 if none is declared
+    """
+
+    def __init__(self, hl7_message: Union[str, bytes, bytearray, memoryview]):
+        """
+        Split a message.
+
+        Args:
+            hl7_message (Union[str, bytes, bytearray, memoryview]): Raw HL7
+                                                                   V2 message
+
+        Raises:
+            hl7.ParseException: If the message does not start with an MSH segment
+        """
+        if isinstance(hl7_message, (memoryview, bytearray)):
+            hl7_message = bytes(hl7_message)
+        is_bytes = isinstance(hl7_message, bytes)
+
+        if not hl7_message.startswith(b'MSH' if is_bytes else 'MSH') or len(hl7_message) < 8:
+            raise hl7.ParseException("Failed to parse HL7 message: message must start with MSH")
+
+        segment_split = _SEGMENT_SPLIT_BYTES if is_bytes else _SEGMENT_SPLIT_STR
+        field_sep = hl7_message[3:4]
+        repetition_sep = hl7_message[5:6]
+
+        # MSH-1 is the field separator itself, so MSH-18 is at index 17
+        msh = segment_split.split(hl7_message, 1)[0].split(field_sep)
+        self.charset = None
+        if len(msh) > 17:
+            msh18 = msh[17].split(repetition_sep)[0]
+            if is_bytes:
+                msh18 = msh18.decode('ascii', errors='ignore')
+            self.charset = resolve_charset(msh18)
+
+        if is_bytes and self.charset is not None and not self.charset.startswith(_ASCII_SAFE_CODECS):
+            hl7_message = hl7_message.decode(self.charset, errors='replace')
+            is_bytes = False
+            segment_split = _SEGMENT_SPLIT_STR
+            field_sep = hl7_message[3:4]
+            repetition_sep = hl7_message[5:6]
+
+        self.is_bytes = is_bytes
+        # Field separator + MSH-2 encoding characters (component, repetition,
+        # escape, subcomponent)
+        self.delimiters = hl7_message[3:8]
+        self.field_sep = field_sep
+        self.component_sep = hl7_message[4:5]
+        self.repetition_sep = repetition_sep
+
+        self.segments = [segment.split(field_sep)
+                         for segment in segment_split.split(hl7_message) if segment]
+        self.segment_types = [fields[0].decode('ascii', errors='replace') if is_bytes else fields[0]
+                              for fields in self.segments]
+
+    def repetitions(self, fields: list, field_index: int) -> list:
+        """Get the raw repetitions of a field ([] if the field is absent or empty)."""
+        if len(fields) <= field_index or not fields[field_index]:
+            return []
+        return fields[field_index].split(self.repetition_sep)
+
+    def component(self, fields: list, field_index: int, component_index: int = 0):
+        """Get a raw component of the first repetition of a field (empty if absent)."""
+        repetitions = self.repetitions(fields, field_index)
+        if not repetitions:
+            return fields[0][:0]
+        components = repetitions[0].split(self.component_sep)
+        if len(components) <= component_index:
+            return fields[0][:0]
+        return components[component_index]
+
+    def value(self, raw) -> str:
+        """Decode and unescape a raw field value."""
+        return unescape_hl7(raw, self.delimiters, self.charset)
+
+
+def extract_obx_subsegments(message: SplitMessage, fields: list,
+                            results: Dict[str, List[str]]) -> None:
+    """
+    Append the OBX.23.1, OBX.15.1 and OBX.15.2 values of one OBX segment.
+
+    Values are taken from the first repetition of each field, then decoded
+    and unescaped. Empty values are skipped.
+
+    Args:
+        message (SplitMessage): Message the segment belongs to
+        fields (list): Fields of the OBX segment
+        results (Dict[str, List[str]]): Results dictionary to append to
+    """
+    for name, field_index, component_index in OBX_SUBSEGMENTS:
+        raw = message.component(fields, field_index, component_index)
+        if raw:
+            value = message.value(raw)
+            if value:  # Only add non-empty values
+                results[name].append(value)
+
+
+def build_message_index(parsed_message) -> Dict[str, Any]:
+    """
+    Build a structural index of a parsed HL7 message in a single scan.
+
+    The index maps each segment type to the positions it occurs at, and
+    groups the OBX and NTE segments that follow each OBR into order groups.
+    OBX/NTE segments that appear before any OBR are collected in a leading
+    group whose 'obr' position is None.
+
+    Args:
+        parsed_message: SplitMessage, or a message returned by hl7.parse()
+
+    Returns:
+        Dict[str, Any]: Dictionary with 'segments' (segment type -> list of
+                        positions) and 'order_groups' (list of dictionaries
+                        with 'obr', 'obx', 'nte' positions and the
+                        'start'/'end' segment range of the group)
+
+    Example:
+        >>> index = build_message_index(SplitMessage(message))
+        >>> index['segments']['OBX']
+        [3, 4, 5]
+        >>> index['order_groups'][0]['obx']
+        [3, 4, 5]
+    """
+    segments: Dict[str, List[int]] = {}
+    order_groups: List[Dict[str, Any]] = []
+    current_group = None
+
+    if isinstance(parsed_message, SplitMessage):
+        segment_types = parsed_message.segment_types
+    else:
+        segment_types = [_segment_type(segment) for segment in parsed_message]
+
+    for position, segment_type in enumerate(segment_types):
+        segments.setdefault(segment_type, []).append(position)
+
+        if segment_type == 'OBR':
+            current_group = {'obr': position, 'obx': [], 'nte': [],
+                             'start': position, 'end': position + 1}
+            order_groups.append(current_group)
+        elif segment_type in ('OBX', 'NTE'):
+            if current_group is None:
+                if segment_type == 'NTE':
+                    # NTE before any OBR/OBX annotates the message, not an order
+                    continue
+                current_group = {'obr': None, 'obx': [], 'nte': [],
+                                 'start': position, 'end': position + 1}
+                order_groups.append(current_group)
+            current_group[segment_type.lower()].append(position)
+            current_group['end'] = position + 1
+        elif current_group is not None and segment_type in ('ORC', 'PID', 'MSH'):
+            # A new order or patient closes the current order group
+            current_group = None
+
+    return {
+        'segments': segments,
+        'order_groups': order_groups
+    }
+
+
+def check_obx_subsegments_by_order(hl7_message: Union[str, bytes, memoryview]) -> List[Dict[str, Any]]:
+    """
+    Check for OBX sub-segments grouped by the OBR order they belong to.
+
+    Args:
+        hl7_message (Union[str, bytes, memoryview]): Raw HL7 V2 message
+
+    Returns:
+        List[Dict[str, Any]]: One entry per order group with 'order_group'
+                              (index), 'obr_position', 'obx_count' and
+                              'results' (same structure as
+                              check_obx_subsegments())
+
+    Raises:
+        hl7.ParseException: If the HL7 message cannot be parsed
+    """
+    message = SplitMessage(hl7_message)
+    message_index = build_message_index(message)
+    order_results = []
+
+    for group_number, group in enumerate(message_index['order_groups']):
+        results = _new_obx_results()
+        for position in group['obx']:
+            extract_obx_subsegments(message, message.segments[position], results)
+
+        order_results.append({
+            'order_group': group_number,
+            'obr_position': group['obr'],
+            'obx_count': len(group['obx']),
+            'results': results
+        })
+
+    return order_results
+
+
+def resolve_charset(msh18: str) -> Optional[str]:
+    """
+    Map an MSH-18 character set name to a Python codec.
+
+    Args:
+        msh18 (str): MSH-18 value, e.g. '8859/1' or 'UNICODE UTF-8'
+
+    Returns:
+        Optional[str]: Codec name, or None if MSH-18 is empty. Unknown names
+                       are tried as Python codec names before giving up.
+                       UTF-16 and UTF-32 are not supported, since the
+                       delimiters of such a message are not single bytes.
+    """
+    name = msh18.strip().upper()
+    if not name:
+        return None
+    if name in HL7_CHARSETS:
+        return HL7_CHARSETS[name]
+    try:
+        codec = codecs.lookup(name).name
+    except LookupError:
+        return None
+    return None if codec.startswith(('utf-16', 'utf-32')) else codec
+
+
+def _decode_value(value: bytes, charset: Optional[str]) -> str:
+    """Decode a field value with the message charset (UTF-8/Latin-1 if undeclared)."""
+    if charset is not None:
+        return value.decode(charset, errors='replace')
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return value.decode('latin-1')
+
+
+def unescape_hl7(value: Union[str, bytes], delimiters: Union[str, bytes],
+                charset: Optional[str] = None) -> str:
+    """
+    Decode a field value and resolve HL7 escape sequences.
+
+    Supports \\F\\ (field), \\S\\ (component), \\T\\ (subcomponent),
+    \\R\\ (repetition), \\E\\ (escape) and \\Xhh...\\ (hexadecimal bytes,
+    decoded with the message charset). Other escape sequences, such as
+    formatting commands, are kept as they are.
+
+    Args:
+        value (Union[str, bytes]): Raw field value; bytes are decoded with
+                                   the charset, str is already decoded
+        delimiters (Union[str, bytes]): Field separator followed by MSH-2,
+                                        e.g. b'|^~\\&', of the same type as value
+        charset (str, optional): Codec from resolve_charset()
+
+    Returns:
+        str: Decoded, unescaped value
+    """
+    is_bytes = isinstance(value, bytes)
+    escape = delimiters[3:4]
+    if not escape or escape not in value:
+        return _decode_value(value, charset) if is_bytes else value
+
+    replacements = {
+        'F': delimiters[0:1],
+        'S': delimiters[1:2],
+        'R': delimiters[2:3],
+        'E': escape,
+        'T': delimiters[4:5]
+    }
+
+    # bytes values are rebuilt as bytes and decoded once at the end; str
+    # values decode only their hexadecimal escapes
+    output = bytearray() if is_bytes else []
+    position = 0
+    while True:
+        start = value.find(escape, position)
+        end = value.find(escape, start + 1) if start >= 0 else -1
+        if end < 0:
+            output += value[position:] if is_bytes else [value[position:]]
+            break
+
+        literal = value[position:start]
+        sequence = value[start + 1:end]
+        name = sequence.decode('ascii', errors='replace') if is_bytes else sequence
+        if name in replacements:
+            replacement = replacements[name]
+        elif name[:1] == 'X' and len(name) > 1:
+            try:
+                hex_bytes = bytes.fromhex(name[1:])
+                replacement = hex_bytes if is_bytes else _decode_value(hex_bytes, charset)
+            except ValueError:
+                replacement = value[start:end + 1]
+        else:
+            replacement = value[start:end + 1]
+
+        if is_bytes:
+            output += literal
+            output += replacement
+        else:
+            output += [literal, replacement]
+        position = end + 1
+
+    return _decode_value(bytes(output), charset) if is_bytes else ''.join(output)
 
 
-def check_obx_subsegments(hl7_message: str) -> Dict[str, List[str]]:
+def check_obx_subsegments(hl7_message: Union[str, bytes, memoryview]) -> Dict[str, List[str]]:
     """
     Check for specific OBX sub-segments in an HL7 message.
 
@@ -31,8 +401,14 @@ def check_obx_subsegments(hl7_message: str) -> Dict[str, List[str]]:
     - OBX.15.2: Producer's Text (second component of Producer's Reference)
     - OBX.23.1: Local Process Control (first component)
 
+    str, bytes and memoryview messages are split and extracted by the same
+    rules (see SplitMessage): segments may end in CR, LF or CRLF, values come
+    from the first repetition of each field, and escape sequences are
+    resolved. Bytes are not decoded as a whole: only the extracted values are
+    decoded, using the character set declared in MSH-18.
+
     Args:
-        hl7_message (str): Raw HL7 V2 message string
+        hl7_message (Union[str, bytes, memoryview]): Raw HL7 V2 message
 
     Returns:
         Dict[str, List[str]]: Dictionary containing subsegment names as keys
@@ -48,60 +424,17 @@ def check_obx_subsegments(hl7_message: str) -> Dict[str, List[str]]:
         ['TestProducer', 'Lab']
     """
 
-    # Parse the HL7 message
-    try:
-        parsed_message = hl7.parse(hl7_message)
-    except Exception as e:
-        raise hl7.ParseException(f"Failed to parse HL7 message: {str(e)}")
+    # Split the HL7 message
+    message = SplitMessage(hl7_message)
 
     # Initialize results dictionary
-    results = {
-        'OBX.23.1': [],  # Local Process Control
-        'OBX.15.1': [],  # Producer's ID
-        'OBX.15.2': []   # Producer's Text
-    }
+    results = _new_obx_results()
 
-    # Find all OBX segments
-    for segment in parsed_message:
-        if segment[0].value == 'OBX':
-            try:
-                # Check OBX.23.1 (Local Process Control)
-                # OBX.23 is typically the 24th field (0-indexed as 23)
-                if len(segment) > 23 and len(segment[23]) > 0:
-                    if hasattr(segment[23][0], 'value'):
-                        value = segment[23][0].value
-                    else:
-                        value = str(segment[23][0])
-
-                    if value:  # Only add non-empty values
-                        results['OBX.23.1'].append(value)
-
-                # Check OBX.15.1 (Producer's ID)
-                # OBX.15 is the 16th field (0-indexed as 15)
-                if len(segment) > 15 and len(segment[15]) > 0:
-                    if hasattr(segment[15][0], 'value'):
-                        value = segment[15][0].value
-                    else:
-                        value = str(segment[15][0])
-
-                    if value:  # Only add non-empty values
-                        results['OBX.15.1'].append(value)
-
-                # Check OBX.15.2 (Producer's Text)
-                # Second component of OBX.15
-                if len(segment) > 15 and len(segment[15]) > 1:
-                    if hasattr(segment[15][1], 'value'):
-                        value = segment[15][1].value
-                    else:
-                        value = str(segment[15][1])
-
-                    if value:  # Only add non-empty values
-                        results['OBX.15.2'].append(value)
-
-            except (IndexError, AttributeError) as e:
-                # Continue processing other segments if one fails
-                print(f"Warning: Error processing OBX segment: {str(e)}")
-                continue
+    # Index the message once, then visit only the OBX segments
+    message_index = build_message_index(message)
+
+    for position in message_index['segments'].get('OBX', []):
+        extract_obx_subsegments(message, message.segments[position], results)
 
     return results
 
@@ -127,22 +460,38 @@ def print_obx_results(results: Dict[str, List[str]]) -> None:
                 print(f"    {i}. {value}")
 
 
-def validate_obx_requirements(results: Dict[str, List[str]],
-                            required_fields: List[str] = None) -> Dict[str, Any]:
+def validate_obx_requirements(results,
+                            required_fields: List[str] = None,
+                            per_order_group: bool = False) -> Dict[str, Any]:
     """
     Validate that required OBX subsegments are present.
 
+    By default a field is considered present if it has at least one value
+    anywhere in the message. With per_order_group=True, results must come
+    from check_obx_subsegments_by_order() and every OBX in each order group
+    must carry a value for each required field.
+
     Args:
-        results (Dict[str, List[str]]): Results from check_obx_subsegments()
+        results: Results from check_obx_subsegments(), or from
+                 check_obx_subsegments_by_order() when per_order_group is set
         required_fields (List[str], optional): List of required field names.
                                              Defaults to all supported fields.
+        per_order_group (bool, optional): Validate each OBR order group
+                                          separately. Defaults to False.
 
     Returns:
-        Dict[str, Any]: Validation results with status and missing fields
+        Dict[str, Any]: Validation results with status and missing fields.
+                        In per-order-group mode, 'order_groups' holds one
+                        validation result per group, 'invalid_order_groups'
+                        lists the indexes of groups that failed and
+                        'empty_order_groups' those without any OBX.
     """
     if required_fields is None:
         required_fields = ['OBX.23.1', 'OBX.15.1', 'OBX.15.2']
 
+    if per_order_group:
+        return _validate_order_groups(results, required_fields)
+
     missing_fields = []
     present_fields = []
 
@@ -163,6 +512,73 @@ def validate_obx_requirements(results: Dict[str, List[str]],
     return validation_result
 
 
+def _validate_order_groups(order_results: List[Dict[str, Any]],
+                           required_fields: List[str]) -> Dict[str, Any]:
+    """
+    Validate required OBX subsegments for each order group.
+
+    A field is present for a group only if every OBX in the group has a value
+    for it. Fields with values on some but not all OBX segments are reported
+    as 'incomplete_fields' (and also counted as missing). Order groups without
+    any OBX (e.g. pending orders) satisfy every field vacuously; they are
+    listed in 'empty_order_groups' instead.
+
+    Args:
+        order_results (List[Dict[str, Any]]): Results from
+                                              check_obx_subsegments_by_order()
+        required_fields (List[str]): List of required field names
+
+    Returns:
+        Dict[str, Any]: Overall status plus per-group validation results
+    """
+    group_validations = []
+    invalid_groups = []
+    empty_groups = []
+
+    for group in order_results:
+        results = group['results']
+        obx_count = group['obx_count']
+        if obx_count == 0:
+            empty_groups.append(group['order_group'])
+
+        missing_fields = []
+        present_fields = []
+        incomplete_fields = []
+
+        for field in required_fields:
+            value_count = len(results.get(field, []))
+            if value_count >= obx_count and (value_count > 0 or obx_count == 0):
+                present_fields.append(field)
+            else:
+                missing_fields.append(field)
+                if value_count > 0:
+                    incomplete_fields.append(field)
+
+        is_valid = len(missing_fields) == 0
+        if not is_valid:
+            invalid_groups.append(group['order_group'])
+
+        group_validations.append({
+            'order_group': group['order_group'],
+            'obr_position': group['obr_position'],
+            'obx_count': obx_count,
+            'is_valid': is_valid,
+            'present_fields': present_fields,
+            'missing_fields': missing_fields,
+            'incomplete_fields': incomplete_fields,
+            'total_required': len(required_fields),
+            'total_present': len(present_fields)
+        })
+
+    return {
+        'is_valid': len(invalid_groups) == 0,
+        'order_groups': group_validations,
+        'invalid_order_groups': invalid_groups,
+        'empty_order_groups': empty_groups,
+        'total_order_groups': len(group_validations)
+    }
+
+
 # Example usage and testing
 if __name__ == "__main__":
     # Sample HL7 message for testing
@@ -0,0 +1,332 @@
+"""
+Compiled HL7 V2 Conformance Profiles
+
+This module replaces flat required-field lists with conformance profiles
+that depend on message type and sender. Profiles are loaded from JSON files
+and compiled into per-segment check tables (precomputed field/component
+indexes), which are applied in the same single pass over the message that
+extracts the OBX subsegments.
+
+Profile file format:
+    {
+        "name": "lab-oru",
+        "message_type": "ORU^R01",
+        "sending_application": "LAB_SYSTEM",
+        "sending_facility": "*",
+        "segments": {
+            "OBX": {
+                "min": 1,
+                "max": null,
+                "fields": {
+                    "OBX.15.1": {"required": true},
+                    "OBX.11": {"required": true, "allowed_values": ["F", "C"]},
+                    "OBX.5": {"max_repetitions": 1, "max_length": 200}
+                }
+            }
+        }
+    }
+
+"sending_application" and "sending_facility" default to "*" (any sender).
+When several profiles match a message, the most specific one wins: exact
+application and facility, then application only, then facility only, then
+the wildcard profile. MSH.1 and MSH.2 hold the delimiters themselves and
+cannot be checked.
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import glob
+import json
+import os
+import re
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from HL7_OBX_Parser import OBX_SUBSEGMENTS, SplitMessage, extract_obx_subsegments
+
+
+WILDCARD = '*'
+
+# Field and component numbers are 1-based
+_FIELD_PATH = re.compile(r'^([A-Z][A-Z0-9]{2})\.([1-9]\d*)(?:\.([1-9]\d*))?$')
+
+
+class FieldCheck:
+    """A precompiled check on one field or component of a segment."""
+
+    __slots__ = ('path', 'field_index', 'component_index', 'required',
+                 'max_repetitions', 'max_length', 'allowed_values')
+
+    def __init__(self, path: str, rule: Dict[str, Any]):
+        match = _FIELD_PATH.match(path)
+        if not match:
+            raise ValueError(f"Invalid field path '{path}'. Expected e.g. 'OBX.15' or 'OBX.15.1'")
+
+        segment_type, field, component = match.groups()
+        if segment_type == 'MSH' and int(field) <= 2:
+            # MSH-1 and MSH-2 are the delimiters themselves, not split fields
+            raise ValueError(f"Field path '{path}' cannot be checked: MSH-1 and MSH-2 hold the delimiters")
+        self.path = path
+        # MSH-1 is the field separator itself, so MSH fields shift by one
+        self.field_index = int(field) - 1 if segment_type == 'MSH' else int(field)
+        self.component_index = int(component) - 1 if component else None
+        self.required = bool(rule.get('required', False))
+        self.max_repetitions = rule.get('max_repetitions')
+        self.max_length = rule.get('max_length')
+
+        allowed = rule.get('allowed_values')
+        self.allowed_values = frozenset(allowed) if allowed else None
+
+
+class ConformanceProfile:
+    """A compiled conformance profile: segment cardinality and field checks."""
+
+    def __init__(self, definition: Dict[str, Any]):
+        """
+        Compile a profile definition.
+
+        Args:
+            definition (Dict[str, Any]): Parsed profile (see module docstring)
+
+        Raises:
+            ValueError: If the definition is invalid
+        """
+        if 'message_type' not in definition:
+            raise ValueError("Conformance profile must define 'message_type'")
+
+        self.name = definition.get('name', definition['message_type'])
+        self.message_type = normalize_message_type(definition['message_type'])
+        self.sending_application = definition.get('sending_application', WILDCARD)
+        self.sending_facility = definition.get('sending_facility', WILDCARD)
+
+        # Segment type -> (min occurrences, max occurrences)
+        self.cardinality: Dict[str, Tuple[int, Optional[int]]] = {}
+        # Segment type -> tuple of FieldCheck
+        self.check_table: Dict[str, Tuple[FieldCheck, ...]] = {}
+
+        for segment_type, segment_rule in definition.get('segments', {}).items():
+            self.cardinality[segment_type] = (segment_rule.get('min', 0), segment_rule.get('max'))
+            checks = []
+            for path, rule in segment_rule.get('fields', {}).items():
+                if not path.startswith(segment_type + '.'):
+                    raise ValueError(f"Field '{path}' is not part of segment {segment_type}")
+                checks.append(FieldCheck(path, rule))
+            self.check_table[segment_type] = tuple(checks)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ConformanceProfile':
+        """Load and compile a profile from a JSON file."""
+        with open(path, encoding='utf-8') as source:
+            return cls(json.load(source))
+
+    @classmethod
+    def from_required_fields(cls, required_fields: List[str],
+                             message_type: str = WILDCARD) -> 'ConformanceProfile':
+        """
+        Build a profile equivalent to a validate_obx_requirements() field list,
+        except that every segment must carry each required field.
+
+        Args:
+            required_fields (List[str]): Field paths, e.g. ['OBX.15.1']
+            message_type (str): MSH-9 message type the profile applies to
+
+        Returns:
+            ConformanceProfile: Compiled profile
+        """
+        segments: Dict[str, Dict[str, Any]] = {}
+        for path in required_fields:
+            segment = segments.setdefault(path.split('.')[0], {'fields': {}})
+            segment['fields'][path] = {'required': True}
+        return cls({'name': 'required-fields', 'message_type': message_type, 'segments': segments})
+
+
+def normalize_message_type(msh9: str) -> str:
+    """
+    Normalize an MSH-9 value to 'TYPE^EVENT' (e.g. 'ORU^R01^ORU_R01' -> 'ORU^R01').
+
+    Args:
+        msh9 (str): MSH-9 message type
+
+    Returns:
+        str: Message code and trigger event
+    """
+    if msh9 == WILDCARD:
+        return msh9
+    return '^'.join(msh9.split('^')[:2]).upper()
+
+
+class ProfileRegistry:
+    """
+    Profiles keyed by (MSH-9, MSH-3, MSH-4) with a lookup cache.
+
+    Lookups resolve the most specific matching profile once per distinct
+    (message type, application, facility) and cache the result.
+    """
+
+    def __init__(self, profiles: Optional[List[ConformanceProfile]] = None):
+        self._profiles: Dict[Tuple[str, str, str], ConformanceProfile] = {}
+        self._cache: Dict[Tuple[str, str, str], Optional[ConformanceProfile]] = {}
+        for profile in profiles or []:
+            self.add(profile)
+
+    def add(self, profile: ConformanceProfile) -> None:
+        """Register a profile, replacing any with the same key."""
+        key = (profile.message_type, profile.sending_application, profile.sending_facility)
+        self._profiles[key] = profile
+        self._cache.clear()
+
+    def load_directory(self, directory: str) -> int:
+        """
+        Load every *.json profile in a directory.
+
+        Args:
+            directory (str): Directory holding profile files
+
+        Returns:
+            int: Number of profiles loaded
+        """
+        paths = sorted(glob.glob(os.path.join(directory, '*.json')))
+        for path in paths:
+            self.add(ConformanceProfile.from_file(path))
+        return len(paths)
+
+    def lookup(self, message_type: str, sending_application: str = '',
+               sending_facility: str = '') -> Optional[ConformanceProfile]:
+        """
+        Find the profile for a message.
+
+        Args:
+            message_type (str): MSH-9 value
+            sending_application (str): MSH-3 value
+            sending_facility (str): MSH-4 value
+
+        Returns:
+            Optional[ConformanceProfile]: Most specific matching profile, or
+                                          None if no profile applies
+        """
+        key = (normalize_message_type(message_type), sending_application, sending_facility)
+        if key in self._cache:
+            return self._cache[key]
+
+        profile = None
+        for candidate_type in (key[0], WILDCARD):
+            for application, facility in ((sending_application, sending_facility),
+                                          (sending_application, WILDCARD),
+                                          (WILDCARD, sending_facility),
+                                          (WILDCARD, WILDCARD)):
+                profile = self._profiles.get((candidate_type, application, facility))
+                if profile is not None:
+                    break
+            if profile is not None:
+                break
+
+        self._cache[key] = profile
+        return profile
+
+
+def check_conformance(hl7_message: Union[str, bytes, memoryview],
+                      registry: Union[ProfileRegistry, ConformanceProfile]) -> Dict[str, Any]:
+    """
+    Extract OBX subsegments and check conformance in a single pass.
+
+    The message is split once with SplitMessage; each segment is looked up in
+    the profile's check table, and OBX segments also have OBX.15.1/15.2/23.1
+    extracted. Checked values are decoded (MSH-18) and unescaped first, so
+    lengths count characters and str and bytes input give the same report.
+
+    Args:
+        hl7_message (Union[str, bytes, memoryview]): Raw HL7 V2 message
+        registry (Union[ProfileRegistry, ConformanceProfile]): Registry to
+            look the profile up in by (MSH-9, MSH-3, MSH-4), or a profile
+
+    Returns:
+        Dict[str, Any]: Dictionary with 'results' (as check_obx_subsegments()),
+                        'profile' (name or None), 'is_valid' (None if no
+                        profile applies), 'violations' (per-segment list)
+                        and 'segment_counts'
+
+    Raises:
+        ValueError: If the message does not start with an MSH segment
+    """
+    if isinstance(hl7_message, (memoryview, bytearray)):
+        hl7_message = bytes(hl7_message)
+    if hl7_message[:3] not in ('MSH', b'MSH') or len(hl7_message) < 8:
+        raise ValueError("HL7 message must start with an MSH segment")
+
+    message = SplitMessage(hl7_message)
+    msh = message.segments[0]
+
+    if isinstance(registry, ConformanceProfile):
+        profile = registry
+    else:
+        # MSH-n is at index n - 1; MSH-9 keeps its components (TYPE^EVENT)
+        message_type = msh[8] if len(msh) > 8 else ''
+        if message.is_bytes:
+            message_type = message_type.decode('ascii', errors='replace')
+        profile = registry.lookup(message_type,
+                                  message.value(message.component(msh, 2)),
+                                  message.value(message.component(msh, 3)))
+
+    check_table = profile.check_table if profile is not None else {}
+    results: Dict[str, List[str]] = {name: [] for name, _, _ in OBX_SUBSEGMENTS}
+    violations: List[Dict[str, Any]] = []
+    segment_counts: Dict[str, int] = {}
+
+    for position, (segment_type, fields) in enumerate(zip(message.segment_types, message.segments)):
+        occurrence = segment_counts.get(segment_type, 0) + 1
+        segment_counts[segment_type] = occurrence
+
+        if segment_type == 'OBX':
+            extract_obx_subsegments(message, fields, results)
+
+        for check in check_table.get(segment_type, ()):
+            repetitions = message.repetitions(fields, check.field_index)
+            if check.component_index is not None:
+                raw = message.component(fields, check.field_index, check.component_index)
+            else:
+                raw = repetitions[0] if repetitions else fields[0][:0]
+            value = message.value(raw) if raw else ''
+
+            violation = None
+            if not value:
+                if check.required:
+                    violation = ('required', f"{check.path} is required")
+            elif check.max_repetitions is not None and len(repetitions) > check.max_repetitions:
+                violation = ('max_repetitions',
+                             f"{check.path} repeats {len(repetitions)} times (max {check.max_repetitions})")
+            elif check.max_length is not None and len(value) > check.max_length:
+                violation = ('max_length',
+                             f"{check.path} is {len(value)} characters long (max {check.max_length})")
+            elif check.allowed_values is not None and value not in check.allowed_values:
+                violation = ('allowed_values', f"{check.path} value '{value}' is not allowed")
+
+            if violation is not None:
+                violations.append({
+                    'segment': segment_type,
+                    'position': position,
+                    'occurrence': occurrence,
+                    'field': check.path,
+                    'rule': violation[0],
+                    'message': violation[1]
+                })
+    if profile is not None:
+        for segment_type, (minimum, maximum) in profile.cardinality.items():
+            count = segment_counts.get(segment_type, 0)
+            if count < minimum or (maximum is not None and count > maximum):
+                violations.append({
+                    'segment': segment_type,
+                    'position': None,
+                    'occurrence': count,
+                    'field': None,
+                    'rule': 'cardinality',
+                    'message': f"{segment_type} occurs {count} times "
+                               f"(expected {minimum}..{'*' if maximum is None else maximum})"
+                })
+
+    return {
+        'results': results,
+        'profile': profile.name if profile is not None else None,
+        'is_valid': not violations if profile is not None else None,
+        'violations': violations,
+        'segment_counts': segment_counts
+    }
@@ -0,0 +1,445 @@
+"""
+HL7 / CCD Command-Line Scanner
+
+Scans files, directories, glob patterns and archives (.zip, .tar, .tar.gz)
+of HL7 V2 messages and CCD documents, runs OBX subsegment extraction and
+validation on every HL7 message and demographic/clinical extraction on every
+CCD, and writes the results as JSON Lines, CSV or a per-sender summary.
+
+Usage:
+    python hl7_ccd_scanner.py inbound/ archive/2024-08.zip "extra/*.hl7"
+    python hl7_ccd_scanner.py inbound/ --workers 8 --format csv -o results.csv
+    python hl7_ccd_scanner.py inbound/ --required OBX.15.1 OBX.15.2 --format summary
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from hl7_ccd_records import CCD_EXTENSIONS, HL7_EXTENSIONS, scan_content
+from obx_conformance_stats import OBXConformanceAggregator
+
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+OUTPUT_FORMATS = ('jsonl', 'csv', 'summary')
+
+CSV_COLUMNS = ['source', 'index', 'type', 'sending_application', 'sending_facility',
+               'is_valid', 'missing_fields', 'OBX.15.1', 'OBX.15.2', 'OBX.23.1', 'error']
+
+# Size of the output buffer and number of records written per bulk write
+WRITE_BUFFER_SIZE = 1024 * 1024
+WRITE_BATCH_SIZE = 1000
+
+# Archive members scanned per worker task, and the most member bytes a single
+# tar task carries to its worker
+ARCHIVE_MEMBERS_PER_TASK = 64
+ARCHIVE_BYTES_PER_TASK = 8 * 1024 * 1024
+
+# A unit of work for scan_task(): (path, archive member names or None,
+# member contents or None, error or None). Zip tasks name their members and
+# are read by the worker; tar members are streamed once by the caller and
+# carry their bytes. An archive that cannot be listed or streamed becomes a
+# task carrying the error, so it is reported like any other failed source.
+ScanTask = Tuple[str, Optional[List[str]], Optional[List[bytes]], Optional[str]]
+
+# Errors raised while opening or reading an archive
+_ARCHIVE_ERRORS = (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError)
+
+
+def _is_archive(path: str) -> bool:
+    """Check whether a path names a supported archive."""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_supported(name: str) -> bool:
+    """Check whether a file name has an HL7 or CCD extension."""
+    return name.lower().endswith(HL7_EXTENSIONS + CCD_EXTENSIONS)
+
+
+def _expand_paths(paths: List[str]) -> Iterator[str]:
+    """Expand directories and glob patterns into file and archive paths."""
+    for pattern in paths:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+
+        for path in matches:
+            if os.path.isdir(path):
+                for directory, _, file_names in os.walk(path):
+                    for file_name in sorted(file_names):
+                        if _is_archive(file_name) or _is_supported(file_name):
+                            yield os.path.join(directory, file_name)
+            else:
+                yield path
+
+
+def _zip_members(path: str) -> List[str]:
+    """List the supported members of a zip archive."""
+    with zipfile.ZipFile(path) as archive:
+        return [info.filename for info in archive.infolist()
+                if not info.is_dir() and _is_supported(info.filename)]
+
+
+def iter_scan_tasks(paths: List[str]) -> Iterator[ScanTask]:
+    """
+    Expand files, directories, globs and archives into worker tasks.
+
+    Regular files are one task each. Zip members are grouped into tasks of
+    ARCHIVE_MEMBERS_PER_TASK, so each worker opens the archive once per task.
+    Tar archives are read in a single streaming pass and their members are
+    handed to workers as bytes, since tar (and .tar.gz in particular) has no
+    index to seek to a member by name.
+
+    Args:
+        paths (List[str]): Paths, directories or glob patterns
+
+    Yields:
+        ScanTask: Tasks for scan_task()
+    """
+    for path in _expand_paths(paths):
+        if not _is_archive(path):
+            yield path, None, None, None
+        elif path.lower().endswith('.zip'):
+            try:
+                names = _zip_members(path)
+            except _ARCHIVE_ERRORS as e:
+                yield path, None, None, str(e)
+                continue
+            for start in range(0, len(names), ARCHIVE_MEMBERS_PER_TASK):
+                yield path, names[start:start + ARCHIVE_MEMBERS_PER_TASK], None, None
+        else:
+            yield from _iter_tar_tasks(path)
+
+
+def _iter_tar_tasks(path: str) -> Iterator[ScanTask]:
+    """
+    Stream a tar archive once, batching member contents into tasks.
+
+    If the archive is corrupt, members read before the damage are still
+    scanned and the error is reported as a task of its own.
+    """
+    names: List[str] = []
+    contents: List[bytes] = []
+    batch_bytes = 0
+    error = None
+
+    try:
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if not member.isfile() or not _is_supported(member.name):
+                    continue
+                data = archive.extractfile(member).read()
+                names.append(member.name)
+                contents.append(data)
+                batch_bytes += len(data)
+                if len(names) >= ARCHIVE_MEMBERS_PER_TASK or batch_bytes >= ARCHIVE_BYTES_PER_TASK:
+                    yield path, names, contents, None
+                    names, contents, batch_bytes = [], [], 0
+    except _ARCHIVE_ERRORS as e:
+        error = str(e)
+
+    if names:
+        yield path, names, contents, None
+    if error is not None:
+        yield path, None, None, error
+
+
+def scan_task(task: ScanTask,
+              required_fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Scan a file or a batch of archive members. Runs inside worker processes.
+
+    Args:
+        task (ScanTask): Task produced by iter_scan_tasks()
+        required_fields (List[str], optional): Required OBX fields
+
+    Returns:
+        Tuple[List[Dict[str, Any]], int, int]: Records, number of bytes read
+                                               and number of sources scanned
+    """
+    path, members, contents, error = task
+
+    if error is not None:
+        return [_error_record(path, error)], 0, 1
+
+    if members is None:
+        try:
+            with open(path, 'rb') as source:
+                data = source.read()
+        except OSError as e:
+            return [_error_record(path, str(e))], 0, 1
+        return scan_content(data, path, path, required_fields), len(data), 1
+
+    records: List[Dict[str, Any]] = []
+    bytes_read = 0
+    if contents is not None:
+        for member, data in zip(members, contents):
+            records.extend(scan_content(data, f"{path}!{member}", member, required_fields))
+            bytes_read += len(data)
+        return records, bytes_read, len(members)
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for member in members:
+                source = f"{path}!{member}"
+                try:
+                    data = archive.read(member)
+                except (KeyError, zipfile.BadZipFile) as e:
+                    records.append(_error_record(source, str(e)))
+                    continue
+                records.extend(scan_content(data, source, member, required_fields))
+                bytes_read += len(data)
+    except _ARCHIVE_ERRORS as e:
+        records.append(_error_record(path, str(e)))
+    return records, bytes_read, len(members)
+
+
+def _error_record(source: str, error: str) -> Dict[str, Any]:
+    """Build the record for a source that could not be read."""
+    return {'source': source, 'index': 0, 'type': 'unknown', 'error': error}
+
+
+class BufferedRecordWriter:
+    """
+    Writes scan records in bulk through a large output buffer.
+
+    Records are collected and written WRITE_BATCH_SIZE at a time with a
+    single writelines() call instead of one write per line.
+    """
+
+    def __init__(self, output: io.TextIOBase, output_format: str = 'jsonl',
+                 required_fields: Optional[List[str]] = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'. "
+                             f"Available formats: {', '.join(OUTPUT_FORMATS)}")
+        self.output = output
+        self.output_format = output_format
+        self.pending: List[str] = []
+        self.aggregator = OBXConformanceAggregator(required_fields)
+        self.ccd_documents = 0
+
+        if output_format == 'csv':
+            self._csv_buffer = io.StringIO()
+            self._csv_writer = csv.DictWriter(self._csv_buffer, fieldnames=CSV_COLUMNS,
+                                              extrasaction='ignore')
+            self._csv_writer.writeheader()
+            self._take_csv_rows()
+
+    def _take_csv_rows(self) -> None:
+        """Move rows formatted by the csv writer into the pending batch."""
+        self.pending.append(self._csv_buffer.getvalue())
+        self._csv_buffer.seek(0)
+        self._csv_buffer.truncate()
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        """Queue records for output, flushing once a batch is full."""
+        for record in records:
+            if self.output_format == 'summary':
+                self._aggregate(record)
+            elif self.output_format == 'jsonl':
+                self.pending.append(json.dumps(record, ensure_ascii=False) + '\n')
+            else:
+                self._csv_writer.writerow(self._csv_row(record))
+
+        if self.output_format == 'csv':
+            self._take_csv_rows()
+        if len(self.pending) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    def _aggregate(self, record: Dict[str, Any]) -> None:
+        """Feed an HL7 record into the per-sender summary."""
+        if record['type'] == 'ccd':
+            self.ccd_documents += 1
+        elif 'error' in record:
+            self.aggregator.errors += 1
+        else:
+            self.aggregator.add(record['sending_application'], record['sending_facility'],
+                                record['results'], record['validation'], record.get('obx_count'))
+
+    @staticmethod
+    def _csv_row(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a record into CSV columns."""
+        row = {key: record.get(key, '') for key in CSV_COLUMNS}
+        validation = record.get('validation')
+        if validation:
+            row['is_valid'] = validation['is_valid']
+            row['missing_fields'] = ' '.join(validation['missing_fields'])
+        for field, values in record.get('results', {}).items():
+            row[field] = '~'.join(values)
+        return row
+
+    def flush(self) -> None:
+        """Write all pending output in one call."""
+        if self.pending:
+            self.output.writelines(self.pending)
+            self.pending = []
+
+    def close(self) -> None:
+        """Flush pending records and write the summary, if selected."""
+        if self.output_format == 'summary':
+            summary = {
+                'senders': self.aggregator.report(),
+                'ccd_documents': self.ccd_documents,
+                'hl7_errors': self.aggregator.errors
+            }
+            self.pending.append(json.dumps(summary, indent=2, ensure_ascii=False) + '\n')
+        self.flush()
+        self.output.flush()
+
+
+class ProgressReporter:
+    """Reports messages/s, MB/s and error counts on stderr while scanning."""
+
+    def __init__(self, interval: float = 1.0, enabled: bool = True):
+        self.interval = interval
+        self.enabled = enabled
+        self.start_time = time.monotonic()
+        self.last_report = self.start_time
+        self.files = 0
+        self.messages = 0
+        self.errors = 0
+        self.bytes_read = 0
+
+    def update(self, records: List[Dict[str, Any]], bytes_read: int, files: int = 1) -> None:
+        """Count scanned sources and report if the interval has passed."""
+        self.files += files
+        self.messages += len(records)
+        self.errors += sum(1 for record in records if 'error' in record)
+        self.bytes_read += bytes_read
+
+        now = time.monotonic()
+        if self.enabled and now - self.last_report >= self.interval:
+            self.last_report = now
+            sys.stderr.write('\r' + self.status_line())
+            sys.stderr.flush()
+
+    def status_line(self) -> str:
+        """Format the current throughput and error counts."""
+        elapsed = max(time.monotonic() - self.start_time, 1e-9)
+        return (f"{self.files} files, {self.messages} messages, {self.errors} errors | "
+                f"{self.messages / elapsed:.0f} msg/s, "
+                f"{self.bytes_read / elapsed / (1024 * 1024):.2f} MB/s")
+
+    def finish(self) -> None:
+        """Print the final status line."""
+        if self.enabled:
+            sys.stderr.write('\r' + self.status_line() + '\n')
+            sys.stderr.flush()
+
+
+def run_scan(paths: List[str], writer: BufferedRecordWriter, workers: int = 1,
+             required_fields: Optional[List[str]] = None,
+             progress: Optional[ProgressReporter] = None) -> ProgressReporter:
+    """
+    Scan all sources and write their records.
+
+    With more than one worker, tasks from iter_scan_tasks() are scanned in a
+    process pool with at most 4 tasks in flight per worker.
+
+    Args:
+        paths (List[str]): Paths, directories, globs or archives to scan
+        writer (BufferedRecordWriter): Output writer
+        workers (int): Number of worker processes
+        required_fields (List[str], optional): Required OBX fields
+        progress (ProgressReporter, optional): Progress reporter
+
+    Returns:
+        ProgressReporter: Final counters
+    """
+    progress = progress or ProgressReporter(enabled=False)
+    tasks = iter_scan_tasks(paths)
+
+    if workers <= 1:
+        for task in tasks:
+            records, bytes_read, files = scan_task(task, required_fields)
+            writer.write(records)
+            progress.update(records, bytes_read, files)
+    else:
+        max_in_flight = workers * 4
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            for task in tasks:
+                in_flight.add(executor.submit(scan_task, task, required_fields))
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        records, bytes_read, files = future.result()
+                        writer.write(records)
+                        progress.update(records, bytes_read, files)
+
+            for future in in_flight:
+                records, bytes_read, files = future.result()
+                writer.write(records)
+                progress.update(records, bytes_read, files)
+
+    writer.close()
+    progress.finish()
+    return progress
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Scan HL7 V2 messages and CCD documents for OBX conformance "
+                    "and clinical data."
+    )
+    parser.add_argument('paths', nargs='+',
+                        help="Files, directories, glob patterns or archives to scan")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument('-r', '--required', nargs='+', default=None, metavar='FIELD',
+                        help="Required OBX fields (default: OBX.23.1 OBX.15.1 OBX.15.2)")
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='jsonl',
+                        help="Output format (default: jsonl)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="Output file (default: stdout)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="Do not report progress on stderr")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the scanner from the command line.
+
+    Args:
+        argv (List[str], optional): Command-line arguments
+
+    Returns:
+        int: Exit status (1 if any source or message failed)
+    """
+    args = build_arg_parser().parse_args(argv)
+
+    if args.output == '-':
+        output = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='',
+                                  write_through=False)
+    else:
+        output = open(args.output, 'w', encoding='utf-8', newline='',
+                      buffering=WRITE_BUFFER_SIZE)
+
+    try:
+        writer = BufferedRecordWriter(output, args.format, args.required)
+        progress = run_scan(args.paths, writer, args.workers, args.required,
+                            ProgressReporter(enabled=not args.quiet))
+    finally:
+        if args.output == '-':
+            output.detach()
+        else:
+            output.close()
+
+    return 1 if progress.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,531 @@
+"""
+Staged Producer/Consumer Pipeline for HL7 and CCD Processing
+
+This module chains the read -> parse -> extract -> validate -> write steps as
+pipeline stages. Each stage has:
+- Its own bounded input queue, so a slow stage (e.g. a database sink) blocks
+  the stages before it instead of letting memory grow (backpressure)
+- Its own concurrency: threads for I/O and lxml work, or a process pool for
+  pure-Python HL7 parsing. Process stages send items to the pool in
+  micro-batches of whatever is already queued (up to `batch_size`), so one
+  inter-process round trip is shared by many items
+- Queue-depth and latency metrics
+
+Stopping a pipeline stops reading new input and drains everything already
+queued through the remaining stages.
+
+Example:
+    >>> pipeline = build_hl7_pipeline(sink=records.append, parse_workers=4)
+    >>> pipeline.run(['inbound/batch1.hl7', 'inbound/batch2.hl7'])
+    >>> pipeline.metrics()['extract']['avg_latency_ms']
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from HL7_OBX_Parser import check_obx_subsegments, validate_obx_requirements
+from hl7_ccd_records import decode_content, split_hl7_messages
+from obx_conformance_stats import extract_sender
+
+
+# Marks the end of input on a stage queue
+_END = object()
+
+EXECUTOR_TYPES = ('thread', 'process')
+
+# Default number of items sent to a process pool in one round trip
+PROCESS_BATCH_SIZE = 32
+
+
+def _process_context():
+    """
+    Get the start method for process pools.
+
+    Pools start their processes from worker threads, and forking a
+    multi-threaded process can deadlock the child, so 'forkserver' (or
+    'spawn' where it is unavailable) is used instead of 'fork'.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _apply_batch(func: Callable[[Any], Any], items: List[Any], expand: bool) -> List[tuple]:
+    """
+    Apply a stage function to a batch of items inside a pool process.
+
+    Returns:
+        List[tuple]: (latency, result, exception) for each item; exception
+                     is None if the item succeeded
+    """
+    outcomes = []
+    for item in items:
+        start_time = time.perf_counter()
+        try:
+            result = func(item)
+            if expand and result is not None:
+                result = list(result)
+        except Exception as e:
+            outcomes.append((time.perf_counter() - start_time, None, e))
+        else:
+            outcomes.append((time.perf_counter() - start_time, result, None))
+    return outcomes
+
+
+class Stage:
+    """A pipeline stage: a function, its workers and its bounded input queue."""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1,
+                 executor: str = 'thread', queue_size: int = 100, expand: bool = False,
+                 batch_size: Optional[int] = None):
+        """
+        Initialize a pipeline stage.
+
+        Args:
+            name (str): Stage name used in metrics
+            func (Callable): Function applied to each item. Returning None
+                             drops the item. Must be picklable (a module-level
+                             function) for process stages.
+            workers (int): Number of concurrent workers
+            executor (str): 'thread' or 'process'
+            queue_size (int): Maximum number of items waiting in the stage
+            expand (bool): If True, func returns an iterable and each element
+                           is passed downstream separately. The iterable is
+                           consumed before any element is passed on, so an
+                           error while iterating drops the whole item.
+            batch_size (int, optional): Maximum items a process stage worker
+                                        sends to the pool at once. Defaults
+                                        to PROCESS_BATCH_SIZE; ignored for
+                                        thread stages.
+        """
+        if executor not in EXECUTOR_TYPES:
+            raise ValueError(f"Unknown executor '{executor}'. "
+                             f"Available executors: {', '.join(EXECUTOR_TYPES)}")
+        if workers < 1:
+            raise ValueError("Stage workers must be at least 1")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("Stage batch_size must be at least 1")
+
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.executor = executor
+        self.expand = expand
+        self.batch_size = batch_size or (PROCESS_BATCH_SIZE if executor == 'process' else 1)
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.max_queue_depth = 0
+
+    def put(self, item: Any) -> None:
+        """Queue an item, blocking while the queue is full."""
+        self.queue.put(item)
+        depth = self.queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def record(self, latency: float, failed: bool) -> None:
+        """Record the processing time of one item."""
+        with self._lock:
+            self.processed += 1
+            self.total_latency += latency
+            if latency > self.max_latency:
+                self.max_latency = latency
+            if failed:
+                self.errors += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth and latency metrics for the stage."""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'executor': self.executor,
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'queue_size': self.queue.maxsize,
+                'processed': self.processed,
+                'errors': self.errors,
+                'avg_latency_ms': 1000 * self.total_latency / self.processed if self.processed else 0.0,
+                'max_latency_ms': 1000 * self.max_latency
+            }
+
+
+class Pipeline:
+    """
+    A chain of stages connected by bounded queues.
+
+    Every stage runs `workers` threads. Thread stages call the stage function
+    directly; process stages submit batches of items to a process pool of
+    the same size, so the threads only wait on results. The latency of a
+    process stage item is measured inside the pool process.
+    """
+
+    def __init__(self, on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        """
+        Initialize an empty pipeline.
+
+        Args:
+            on_error (Callable, optional): Called with (stage name, item,
+                                           exception) when a stage function
+                                           raises. Failed items are dropped,
+                                           and exceptions raised by the
+                                           callback itself are ignored.
+        """
+        self.stages: List[Stage] = []
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._pools: List[ProcessPoolExecutor] = []
+        self._feeder: Optional[threading.Thread] = None
+
+    def add_stage(self, name: str, func: Callable[[Any], Any], workers: int = 1,
+                  executor: str = 'thread', queue_size: int = 100,
+                  expand: bool = False, batch_size: Optional[int] = None) -> 'Pipeline':
+        """
+        Append a stage to the pipeline. See Stage for the arguments.
+
+        Returns:
+            Pipeline: self, so calls can be chained
+        """
+        self.stages.append(Stage(name, func, workers, executor, queue_size, expand, batch_size))
+        return self
+
+    def start(self, items: Iterable[Any]) -> None:
+        """
+        Start all stages and feed items into the first one in the background.
+
+        Args:
+            items (Iterable[Any]): Input items for the first stage
+        """
+        if not self.stages:
+            raise ValueError("Pipeline has no stages")
+
+        self._stop.clear()
+        for position, stage in enumerate(self.stages):
+            downstream = self.stages[position + 1] if position + 1 < len(self.stages) else None
+            pool = None
+            if stage.executor == 'process':
+                pool = ProcessPoolExecutor(max_workers=stage.workers, mp_context=_process_context())
+                self._pools.append(pool)
+
+            # Workers of a stage share a countdown so the last one to finish
+            # signals end of input to the next stage
+            remaining = [stage.workers]
+            remaining_lock = threading.Lock()
+
+            for worker_number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._run_worker,
+                    args=(stage, downstream, pool, remaining, remaining_lock),
+                    name=f"{stage.name}-{worker_number}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+        self._feeder = threading.Thread(target=self._feed, args=(items,),
+                                        name='feeder', daemon=True)
+        self._feeder.start()
+
+    def _feed(self, items: Iterable[Any]) -> None:
+        """Feed input into the first stage until exhausted or stopped."""
+        first = self.stages[0]
+        try:
+            for item in items:
+                if self._stop.is_set():
+                    break
+                first.put(item)
+        finally:
+            for _ in range(first.workers):
+                first.put(_END)
+
+    def _run_worker(self, stage: Stage, downstream: Optional[Stage],
+                    pool: Optional[ProcessPoolExecutor], remaining: List[int],
+                    remaining_lock: threading.Lock) -> None:
+        """Process items from a stage queue until end of input."""
+        try:
+            while True:
+                item = stage.queue.get()
+                if item is _END:
+                    break
+                if pool is None:
+                    self._process_item(stage, downstream, item)
+                    continue
+
+                # Batch whatever else is already queued, without waiting
+                batch = [item]
+                ended = False
+                while len(batch) < stage.batch_size:
+                    try:
+                        item = stage.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _END:
+                        ended = True
+                        break
+                    batch.append(item)
+                self._process_batch(stage, downstream, pool, batch)
+                if ended:
+                    break
+        finally:
+            # Always count this worker out, even if it died, so downstream
+            # stages still receive end of input and join() returns
+            with remaining_lock:
+                remaining[0] -= 1
+                last_worker = remaining[0] == 0
+            if last_worker and downstream is not None:
+                for _ in range(downstream.workers):
+                    downstream.put(_END)
+
+    def _process_item(self, stage: Stage, downstream: Optional[Stage], item: Any) -> None:
+        """Apply a stage function to one item and pass the result downstream."""
+        start_time = time.perf_counter()
+        try:
+            result = stage.func(item)
+            if stage.expand and result is not None:
+                # Iterate here so a failing generator is handled like a failing func
+                result = list(result)
+        except Exception as e:
+            stage.record(time.perf_counter() - start_time, True)
+            self._report_error(stage, item, e)
+            return
+        stage.record(time.perf_counter() - start_time, False)
+        self._pass_downstream(stage, downstream, result)
+
+    def _process_batch(self, stage: Stage, downstream: Optional[Stage],
+                       pool: ProcessPoolExecutor, batch: List[Any]) -> None:
+        """Apply a stage function to a batch of items in the process pool."""
+        start_time = time.perf_counter()
+        try:
+            outcomes = pool.submit(_apply_batch, stage.func, batch, stage.expand).result()
+        except Exception as e:
+            # The batch could not be sent or returned (e.g. unpicklable or a
+            # broken pool): every item in it failed
+            latency = (time.perf_counter() - start_time) / len(batch)
+            for item in batch:
+                stage.record(latency, True)
+                self._report_error(stage, item, e)
+            return
+
+        for item, (latency, result, error) in zip(batch, outcomes):
+            stage.record(latency, error is not None)
+            if error is not None:
+                self._report_error(stage, item, error)
+            else:
+                self._pass_downstream(stage, downstream, result)
+
+    @staticmethod
+    def _pass_downstream(stage: Stage, downstream: Optional[Stage], result: Any) -> None:
+        """Queue a stage result (or each element of an expanded result) downstream."""
+        if result is None or downstream is None:
+            return
+        if stage.expand:
+            for element in result:
+                downstream.put(element)
+        else:
+            downstream.put(result)
+
+    def _report_error(self, stage: Stage, item: Any, error: Exception) -> None:
+        """Pass a stage error to on_error; errors raised by the callback are ignored."""
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(stage.name, item, error)
+        except Exception:
+            # The failure is already counted in the stage metrics; a broken
+            # callback must not stop the worker
+            pass
+
+    def stop(self) -> None:
+        """Stop reading new input; items already queued are drained."""
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all queued items to drain through every stage.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if the pipeline finished, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in [self._feeder] + self._threads:
+            if thread is None:
+                continue
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                return False
+
+        for pool in self._pools:
+            pool.shutdown()
+        self._pools = []
+        self._threads = []
+        return True
+
+    def run(self, items: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the pipeline to completion.
+
+        Args:
+            items (Iterable[Any]): Input items for the first stage
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Final per-stage metrics
+        """
+        self.start(items)
+        try:
+            self.join()
+        except KeyboardInterrupt:
+            # Stop reading and let queued items drain before exiting
+            self.stop()
+            self.join()
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get queue-depth and latency metrics for every stage.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Stage name -> stage metrics
+        """
+        return {stage.name: stage.metrics() for stage in self.stages}
+
+
+def read_hl7_file(path: str) -> List[str]:
+    """
+    Read an HL7 file and split it into messages.
+
+    Args:
+        path (str): HL7 file path
+
+    Returns:
+        List[str]: Messages in the file
+    """
+    with open(path, 'rb') as source:
+        return split_hl7_messages(decode_content(source.read()))
+
+
+def extract_hl7_record(hl7_message: str) -> Dict[str, Any]:
+    """
+    Parse a message and extract its sender and OBX subsegments.
+
+    Args:
+        hl7_message (str): Raw HL7 V2 message string
+
+    Returns:
+        Dict[str, Any]: Record with 'message', 'sending_application',
+                        'sending_facility' and 'results'
+    """
+    application, facility = extract_sender(hl7_message)
+    return {
+        'message': hl7_message,
+        'sending_application': application,
+        'sending_facility': facility,
+        'results': check_obx_subsegments(hl7_message)
+    }
+
+
+class _ValidateRecord:
+    """Picklable validation step bound to a required-field list."""
+
+    def __init__(self, required_fields: Optional[List[str]] = None):
+        self.required_fields = required_fields
+
+    def __call__(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        record['validation'] = validate_obx_requirements(record['results'], self.required_fields)
+        return record
+
+
+def extract_ccd_record(path: str) -> Dict[str, Any]:
+    """
+    Read a CCD document and run the CCDParser extractors.
+
+    Args:
+        path (str): CCD file path
+
+    Returns:
+        Dict[str, Any]: Record with 'source', 'demographics', 'problems',
+                        'medications' and 'allergies'
+    """
+    from CCD_xpath_examples import CCDParser
+
+    with open(path, 'rb') as source:
+        parser = CCDParser(decode_content(source.read()))
+
+    return {
+        'source': path,
+        'demographics': parser.extract_patient_demographics(),
+        'problems': parser.extract_problems(),
+        'medications': parser.extract_medications(),
+        'allergies': parser.extract_allergies()
+    }
+
+
+def build_hl7_pipeline(sink: Callable[[Dict[str, Any]], None],
+                       required_fields: Optional[List[str]] = None,
+                       read_workers: int = 2, parse_workers: int = 4,
+                       sink_workers: int = 1, queue_size: int = 100,
+                       on_error: Optional[Callable[[str, Any, Exception], None]] = None) -> Pipeline:
+    """
+    Build a read -> extract -> validate -> write pipeline for HL7 files.
+
+    Parsing runs in a process pool; reading, validation and the sink run in
+    threads. Feed the pipeline with HL7 file paths.
+
+    Args:
+        sink (Callable): Called with each validated record
+        required_fields (List[str], optional): Fields passed to
+                                               validate_obx_requirements()
+        read_workers (int): File reader threads
+        parse_workers (int): HL7 parser processes
+        sink_workers (int): Sink threads
+        queue_size (int): Bound of every stage queue
+        on_error (Callable, optional): Stage error callback
+
+    Returns:
+        Pipeline: Configured pipeline, not yet started
+    """
+    pipeline = Pipeline(on_error=on_error)
+    pipeline.add_stage('read', read_hl7_file, read_workers, 'thread', queue_size, expand=True)
+    pipeline.add_stage('extract', extract_hl7_record, parse_workers, 'process', queue_size)
+    pipeline.add_stage('validate', _ValidateRecord(required_fields), 1, 'thread', queue_size)
+    pipeline.add_stage('write', sink, sink_workers, 'thread', queue_size)
+    return pipeline
+
+
+def build_ccd_pipeline(sink: Callable[[Dict[str, Any]], None],
+                       extract_workers: int = 4, sink_workers: int = 1,
+                       queue_size: int = 100,
+                       on_error: Optional[Callable[[str, Any, Exception], None]] = None) -> Pipeline:
+    """
+    Build a read/extract -> write pipeline for CCD files.
+
+    lxml releases the GIL while parsing, so extraction runs in threads.
+    Feed the pipeline with CCD file paths.
+
+    Args:
+        sink (Callable): Called with each extracted record
+        extract_workers (int): Extraction threads
+        sink_workers (int): Sink threads
+        queue_size (int): Bound of every stage queue
+        on_error (Callable, optional): Stage error callback
+
+    Returns:
+        Pipeline: Configured pipeline, not yet started
+    """
+    pipeline = Pipeline(on_error=on_error)
+    pipeline.add_stage('extract', extract_ccd_record, extract_workers, 'thread', queue_size)
+    pipeline.add_stage('write', sink, sink_workers, 'thread', queue_size)
+    return pipeline
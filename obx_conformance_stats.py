@@ -0,0 +1,350 @@
+"""
+Streaming OBX Conformance Statistics by Sender
+
+This module aggregates the output of check_obx_subsegments() and
+validate_obx_requirements() per sending application (MSH-3) and sending
+facility (MSH-4) without keeping individual results in memory.
+
+For each sender it keeps:
+- Message and OBX counters and per-field presence rates
+- Approximate distinct producer IDs (OBX.15.1) using a HyperLogLog sketch
+- Top-K missing-field combinations using the Space-Saving algorithm
+
+All structures have a fixed size and can be merged, so workers can aggregate
+independently and combine their results at the end of the day.
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import hashlib
+import math
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+from HL7_OBX_Parser import check_obx_subsegments, validate_obx_requirements
+
+
+DEFAULT_FIELDS = ['OBX.15.1', 'OBX.15.2', 'OBX.23.1']
+
+# Sender key used once max_senders distinct senders have been seen
+OTHER_SENDER = ('*', '*')
+
+
+def _hash64(value: str) -> int:
+    """Hash a string into an unsigned 64-bit integer."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch for approximate distinct counting.
+
+    Uses 2**precision one-byte registers; the default precision of 10 uses
+    1 KB per sketch with a standard error of about 3%.
+    """
+
+    def __init__(self, precision: int = 10):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        """Add a value to the sketch."""
+        hashed = _hash64(value)
+        register = hashed >> (64 - self.precision)
+        remaining = (hashed << self.precision) & ((1 << 64) - 1)
+        rank = min(64 - remaining.bit_length(), 64 - self.precision) + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def count(self) -> int:
+        """Return the estimated number of distinct values added."""
+        register_count = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / register_count)
+        estimate = alpha * register_count * register_count / sum(2.0 ** -r for r in self.registers)
+
+        zero_registers = self.registers.count(0)
+        if estimate <= 2.5 * register_count and zero_registers:
+            # Small range correction (linear counting)
+            estimate = register_count * math.log(register_count / zero_registers)
+
+        return int(round(estimate))
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """Merge another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-K counter.
+
+    Tracks at most `capacity` items. When full, a new item replaces the item
+    with the smallest count and inherits that count, so reported counts are
+    upper bounds and frequent items are never missed.
+    """
+
+    def __init__(self, capacity: int = 10):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, item: str, count: int = 1) -> None:
+        """Count an occurrence of an item."""
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+        else:
+            smallest = min(self.counts, key=self.counts.get)
+            self.counts[item] = self.counts.pop(smallest) + count
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Return the k most frequent items with their counts."""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if k is None else ranked[:k]
+
+    def _floor(self) -> int:
+        """Upper bound on the count of any item this counter does not track."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other: 'SpaceSaving') -> None:
+        """
+        Merge another counter, keeping the `capacity` largest counts.
+
+        An item missing from one counter may still have been seen by it up to
+        that counter's smallest count (if it is full), so that count is added
+        for it. Merged counts therefore remain upper bounds.
+        """
+        own_floor = self._floor()
+        other_floor = other._floor()
+        combined = {}
+        for item in set(self.counts) | set(other.counts):
+            combined[item] = (self.counts.get(item, own_floor)
+                              + other.counts.get(item, other_floor))
+        ranked = sorted(combined.items(), key=lambda item: (-item[1], item[0]))
+        self.counts = dict(ranked[:self.capacity])
+
+
+class SenderStats:
+    """Fixed-size conformance statistics for a single sender."""
+
+    def __init__(self, fields: List[str], hll_precision: int = 10, top_k: int = 10):
+        self.fields = list(fields)
+        self.messages = 0
+        self.valid_messages = 0
+        self.obx_segments = 0
+        # Number of messages in which each field was present
+        self.field_present = {field: 0 for field in self.fields}
+        # Number of OBX segments carrying each field, and the OBX segments
+        # of the messages these were counted over
+        self.field_values = {field: 0 for field in self.fields}
+        self.counted_obx_segments = 0
+        self.producer_ids = HyperLogLog(hll_precision)
+        self.missing_combinations = SpaceSaving(top_k)
+
+    def add(self, results: Dict[str, List[str]], validation: Dict[str, Any],
+            obx_count: Optional[int] = None) -> None:
+        """
+        Add one message's extraction and validation results.
+
+        Args:
+            results (Dict[str, List[str]]): Results from check_obx_subsegments()
+            validation (Dict[str, Any]): Results from validate_obx_requirements()
+            obx_count (int, optional): Number of OBX segments in the message
+        """
+        self.messages += 1
+        if validation['is_valid']:
+            self.valid_messages += 1
+        if obx_count is not None:
+            self.obx_segments += obx_count
+            self.counted_obx_segments += obx_count
+
+        for field in self.fields:
+            values = results.get(field)
+            if values:
+                self.field_present[field] += 1
+                if obx_count is not None:
+                    self.field_values[field] += len(values)
+
+        for producer_id in results.get('OBX.15.1', []):
+            self.producer_ids.add(producer_id)
+
+        if validation['missing_fields']:
+            self.missing_combinations.add('+'.join(sorted(validation['missing_fields'])))
+
+    def merge(self, other: 'SenderStats') -> None:
+        """Merge statistics for the same sender from another aggregator."""
+        self.messages += other.messages
+        self.valid_messages += other.valid_messages
+        self.obx_segments += other.obx_segments
+        for field, count in other.field_present.items():
+            self.field_present[field] = self.field_present.get(field, 0) + count
+        for field, count in other.field_values.items():
+            self.field_values[field] = self.field_values.get(field, 0) + count
+        self.counted_obx_segments += other.counted_obx_segments
+        self.producer_ids.merge(other.producer_ids)
+        self.missing_combinations.merge(other.missing_combinations)
+
+    def summary(self, top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Return counters, presence rates and sketch estimates.
+
+        'presence_rates' is the share of messages with the field on any OBX;
+        'obx_presence_rates' is the share of OBX segments carrying it, over
+        messages added with an obx_count.
+        """
+        return {
+            'messages': self.messages,
+            'valid_messages': self.valid_messages,
+            'valid_rate': self.valid_messages / self.messages if self.messages else 0.0,
+            'obx_segments': self.obx_segments,
+            'presence_rates': {
+                field: count / self.messages if self.messages else 0.0
+                for field, count in self.field_present.items()
+            },
+            'obx_presence_rates': {
+                field: count / self.counted_obx_segments if self.counted_obx_segments else 0.0
+                for field, count in self.field_values.items()
+            },
+            'distinct_producer_ids': self.producer_ids.count(),
+            'top_missing_combinations': self.missing_combinations.top(top_k)
+        }
+
+
+def extract_sender(hl7_message: str) -> Tuple[str, str]:
+    """
+    Extract the sending application (MSH-3) and facility (MSH-4).
+
+    Args:
+        hl7_message (str): Raw HL7 V2 message string
+
+    Returns:
+        Tuple[str, str]: (sending application, sending facility), using the
+                         first component of each field
+    """
+    if not hl7_message.startswith('MSH') or len(hl7_message) < 8:
+        raise ValueError("HL7 message must start with an MSH segment")
+
+    field_sep = hl7_message[3]
+    component_sep = hl7_message[4]
+    msh = re.split(r'\r|\n', hl7_message, maxsplit=1)[0].split(field_sep)
+
+    # MSH-1 is the field separator itself, so MSH-n is at index n - 1
+    application = msh[2].split(component_sep)[0] if len(msh) > 2 else ''
+    facility = msh[3].split(component_sep)[0] if len(msh) > 3 else ''
+    return application, facility
+
+
+class OBXConformanceAggregator:
+    """
+    Streaming aggregator of OBX conformance keyed by (MSH-3, MSH-4).
+
+    Memory is bounded by max_senders; once that many senders have been seen,
+    further senders are aggregated under OTHER_SENDER.
+    """
+
+    def __init__(self, required_fields: List[str] = None, max_senders: int = 10000,
+                 hll_precision: int = 10, top_k: int = 10):
+        """
+        Initialize the aggregator.
+
+        Args:
+            required_fields (List[str], optional): Fields to track. Defaults
+                                                   to all supported fields.
+            max_senders (int): Maximum number of senders tracked separately
+            hll_precision (int): HyperLogLog precision for producer IDs
+            top_k (int): Number of missing-field combinations kept per sender
+        """
+        self.required_fields = list(required_fields or DEFAULT_FIELDS)
+        self.max_senders = max_senders
+        self.hll_precision = hll_precision
+        self.top_k = top_k
+        self.senders: Dict[Tuple[str, str], SenderStats] = {}
+        self.errors = 0
+
+    def _stats_for(self, sender: Tuple[str, str]) -> SenderStats:
+        """Get or create the statistics for a sender."""
+        stats = self.senders.get(sender)
+        if stats is None:
+            if len(self.senders) >= self.max_senders and sender != OTHER_SENDER:
+                return self._stats_for(OTHER_SENDER)
+            stats = SenderStats(self.required_fields, self.hll_precision, self.top_k)
+            self.senders[sender] = stats
+        return stats
+
+    def add(self, sending_application: str, sending_facility: str,
+            results: Dict[str, List[str]], validation: Dict[str, Any] = None,
+            obx_count: Optional[int] = None) -> None:
+        """
+        Add the extraction and validation results of one message.
+
+        Args:
+            sending_application (str): MSH-3 value
+            sending_facility (str): MSH-4 value
+            results (Dict[str, List[str]]): Results from check_obx_subsegments()
+            validation (Dict[str, Any], optional): Results from
+                                                   validate_obx_requirements();
+                                                   computed if not given
+            obx_count (int, optional): Number of OBX segments in the message
+        """
+        if validation is None:
+            validation = validate_obx_requirements(results, self.required_fields)
+        self._stats_for((sending_application, sending_facility)).add(results, validation, obx_count)
+
+    def add_message(self, hl7_message: str) -> None:
+        """
+        Extract, validate and aggregate a raw HL7 message.
+
+        Messages that cannot be parsed are counted in `errors`.
+
+        Args:
+            hl7_message (str): Raw HL7 V2 message string
+        """
+        try:
+            application, facility = extract_sender(hl7_message)
+            results = check_obx_subsegments(hl7_message)
+        except Exception:
+            self.errors += 1
+            return
+        obx_count = len(re.findall(r'(?:^|[\r\n])OBX', hl7_message))
+        self.add(application, facility, results, obx_count=obx_count)
+
+    def merge(self, other: 'OBXConformanceAggregator') -> None:
+        """
+        Merge another aggregator (e.g. from a worker process) into this one.
+
+        Args:
+            other (OBXConformanceAggregator): Aggregator with the same
+                                              sketch settings
+        """
+        for sender, stats in other.senders.items():
+            target = self._stats_for(sender)
+            target.merge(stats)
+        self.errors += other.errors
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Build the per-sender conformance report.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per sender, sorted by message
+                                  count, with 'sending_application',
+                                  'sending_facility' and the sender summary
+        """
+        report = []
+        for (application, facility), stats in self.senders.items():
+            entry = {
+                'sending_application': application,
+                'sending_facility': facility
+            }
+            entry.update(stats.summary())
+            report.append(entry)
+
+        report.sort(key=lambda entry: -entry['messages'])
+        return report
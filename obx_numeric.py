@@ -0,0 +1,385 @@
+"""
+Vectorized Numeric Observation Extraction
+
+This module collects numeric results from many HL7 V2 messages (NM-type OBX
+segments) and CCD documents (lab result and vital sign observations) into
+NumPy arrays, and flags abnormal values against their reference ranges in
+vectorized form.
+
+Column mapping:
+
+| Column   | HL7 V2 (OBX)             | CCD (see CCD_mapping_guide.md)                   |
+|----------|--------------------------|--------------------------------------------------|
+| code     | OBX-3.1 (LOINC)          | ./code/@code                                     |
+| value    | OBX-5                    | ./value/@value                                   |
+| unit     | OBX-6.1                  | ./value/@unit                                    |
+| low      | OBX-7 (e.g. '12.0-16.0') | ./referenceRange/observationRange/value/low/@value  |
+| high     | OBX-7                    | ./referenceRange/observationRange/value/high/@value |
+| reported | OBX-8                    | ./interpretationCode/@code                       |
+
+Reference ranges and flags repeat heavily across results, so each distinct
+range string is parsed once and broadcast back to all rows.
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import re
+from typing import Iterable, List, Any, Optional, Tuple, Union
+
+import hl7
+import numpy as np
+
+from HL7_OBX_Parser import SplitMessage
+
+
+# Flag codes used in the flag arrays
+FLAG_UNKNOWN = -1
+FLAG_NORMAL = 0
+FLAG_LOW = 1
+FLAG_HIGH = 2
+
+# OBX-8 / interpretationCode values (HL7 table 0078) -> flag codes
+ABNORMAL_FLAG_CODES = {
+    'N': FLAG_NORMAL,
+    'L': FLAG_LOW,
+    'LL': FLAG_LOW,
+    '<': FLAG_LOW,
+    'H': FLAG_HIGH,
+    'HH': FLAG_HIGH,
+    '>': FLAG_HIGH
+}
+
+SOURCE_HL7 = 0
+SOURCE_CCD = 1
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)'
+_RANGE_BETWEEN = re.compile(rf'^\s*({_NUMBER})\s*-\s*({_NUMBER})\s*$')
+_RANGE_BOUND = re.compile(rf'^\s*([<>])=?\s*({_NUMBER})\s*$')
+
+
+def parse_reference_range(reference_range: str) -> Tuple[float, float]:
+    """
+    Parse an HL7 reference range into numeric bounds.
+
+    Args:
+        reference_range (str): OBX-7 value, e.g. '12.0-16.0', '<5' or '>=60'
+
+    Returns:
+        Tuple[float, float]: (low, high), with NaN for a missing bound
+    """
+    match = _RANGE_BETWEEN.match(reference_range)
+    if match:
+        return float(match.group(1)), float(match.group(2))
+
+    match = _RANGE_BOUND.match(reference_range)
+    if match:
+        bound = float(match.group(2))
+        return (np.nan, bound) if match.group(1) == '<' else (bound, np.nan)
+
+    return np.nan, np.nan
+
+
+def _categorize(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as integer codes into a sorted array of categories."""
+    if not values:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=str)
+    categories, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return codes.astype(np.int32), categories
+
+
+def _to_float(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert value strings to float64 with a null mask.
+
+    Non-finite parses ('inf', 'Infinity', 'nan') are not results and are
+    treated as null.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (values, null mask); null entries are NaN
+    """
+    strings = np.char.strip(np.asarray(values, dtype=str)) if values else np.empty(0, dtype=str)
+    result = np.full(len(strings), np.nan, dtype=np.float64)
+    present = np.char.str_len(strings) > 0 if len(strings) else np.zeros(0, dtype=bool)
+
+    try:
+        result[present] = strings[present].astype(np.float64)
+    except ValueError:
+        # Non-numeric values present: convert each distinct string once
+        categories, inverse = np.unique(strings[present], return_inverse=True)
+        converted = np.array([_safe_float(value) for value in categories], dtype=np.float64)
+        result[present] = converted[inverse]
+
+    value_null = ~np.isfinite(result)
+    result[value_null] = np.nan
+    return result, value_null
+
+
+def _safe_float(value: str) -> float:
+    """Convert a string to float, returning NaN if it is not numeric."""
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+class ObservationBatch:
+    """
+    Column arrays for a batch of numeric observations.
+
+    Attributes:
+        record_index (np.ndarray): int32 index of the source message/document
+        source (np.ndarray): int8, SOURCE_HL7 or SOURCE_CCD
+        value (np.ndarray): float64 result value (NaN when null)
+        value_null (np.ndarray): bool null mask for value
+        unit_codes / units (np.ndarray): categorical unit codes and categories
+        code_codes / codes (np.ndarray): categorical LOINC codes and categories
+        low / high (np.ndarray): float64 reference range bounds (NaN if absent)
+        reported_flag (np.ndarray): int8 flag from OBX-8 / interpretationCode
+        computed_flag (np.ndarray): int8 flag computed from value and range
+    """
+
+    def __init__(self, record_index: np.ndarray, source: np.ndarray,
+                 value: np.ndarray, value_null: np.ndarray,
+                 unit_codes: np.ndarray, units: np.ndarray,
+                 code_codes: np.ndarray, codes: np.ndarray,
+                 low: np.ndarray, high: np.ndarray, reported_flag: np.ndarray):
+        self.record_index = record_index
+        self.source = source
+        self.value = value
+        self.value_null = value_null
+        self.unit_codes = unit_codes
+        self.units = units
+        self.code_codes = code_codes
+        self.codes = codes
+        self.low = low
+        self.high = high
+        self.reported_flag = reported_flag
+        self.computed_flag = compute_flags(value, low, high)
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    @property
+    def flag_mismatch(self) -> np.ndarray:
+        """Rows where both flags are known and the computed flag differs."""
+        return ((self.computed_flag != FLAG_UNKNOWN) & (self.reported_flag != FLAG_UNKNOWN)
+                & (self.computed_flag != self.reported_flag))
+
+    @property
+    def abnormal(self) -> np.ndarray:
+        """Rows whose computed flag is low or high."""
+        return (self.computed_flag == FLAG_LOW) | (self.computed_flag == FLAG_HIGH)
+
+    def select(self, code: str) -> np.ndarray:
+        """
+        Get a row mask for one LOINC code.
+
+        Args:
+            code (str): LOINC code, e.g. '718-7'
+
+        Returns:
+            np.ndarray: Boolean mask, all False if the code is not present
+        """
+        matches = np.flatnonzero(self.codes == code)
+        if not len(matches):
+            return np.zeros(len(self), dtype=bool)
+        return self.code_codes == matches[0]
+
+
+def compute_flags(value: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """
+    Flag values against reference ranges.
+
+    Bounds are inclusive. Rows with a null value, or without any bound, are
+    FLAG_UNKNOWN; a row with a single bound is normal on the other side.
+
+    Args:
+        value (np.ndarray): float64 values
+        low (np.ndarray): float64 lower bounds (NaN if absent)
+        high (np.ndarray): float64 upper bounds (NaN if absent)
+
+    Returns:
+        np.ndarray: int8 flag codes
+    """
+    flags = np.full(len(value), FLAG_UNKNOWN, dtype=np.int8)
+    has_range = ~np.isnan(low) | ~np.isnan(high)
+    known = ~np.isnan(value) & has_range
+
+    with np.errstate(invalid='ignore'):
+        below = value < low
+        above = value > high
+
+    flags[known] = FLAG_NORMAL
+    flags[known & below] = FLAG_LOW
+    flags[known & above] = FLAG_HIGH
+    return flags
+
+
+class ObservationBatchBuilder:
+    """Collects numeric observations from HL7 messages and CCDs into a batch."""
+
+    def __init__(self):
+        self._record_index: List[int] = []
+        self._source: List[int] = []
+        self._values: List[str] = []
+        self._units: List[str] = []
+        self._codes: List[str] = []
+        self._ranges: List[str] = []
+        # Bounds given as separate numbers (CCD); the range string is empty then
+        self._low: List[str] = []
+        self._high: List[str] = []
+        self._flags: List[str] = []
+        self._records = 0
+
+    def add_hl7_message(self, hl7_message: Union[str, bytes], record_index: Optional[int] = None) -> int:
+        """
+        Collect the NM-type OBX segments of a message.
+
+        The message is split with SplitMessage, so bytes messages are decoded
+        per MSH-18 and every value is unescaped (e.g. '10\\S\\3/uL' -> '10^3/uL').
+
+        Args:
+            hl7_message (Union[str, bytes]): Raw HL7 V2 message
+            record_index (int, optional): Index stored with the rows.
+                                          Defaults to a running counter.
+
+        Returns:
+            int: Number of observations collected
+        """
+        try:
+            message = SplitMessage(hl7_message)
+        except hl7.ParseException as e:
+            raise ValueError("HL7 message must start with an MSH segment") from e
+
+        def field(fields: list, field_index: int) -> str:
+            return message.value(fields[field_index]) if len(fields) > field_index else ''
+
+        index = self._next_index(record_index)
+        collected = 0
+
+        for segment_type, fields in zip(message.segment_types, message.segments):
+            if segment_type != 'OBX' or len(fields) < 6 or field(fields, 2) != 'NM':
+                continue
+
+            self._record_index.append(index)
+            self._source.append(SOURCE_HL7)
+            self._codes.append(message.value(message.component(fields, 3)))
+            self._values.append(field(fields, 5))
+            self._units.append(message.value(message.component(fields, 6)))
+            self._ranges.append(field(fields, 7))
+            self._low.append('')
+            self._high.append('')
+            self._flags.append(field(fields, 8))
+            collected += 1
+
+        return collected
+
+    def add_ccd(self, ccd, record_index: Optional[int] = None) -> int:
+        """
+        Collect lab result and vital sign observations from a CCD.
+
+        Args:
+            ccd (Union[str, CCDParser]): CCD XML content or an existing parser
+            record_index (int, optional): Index stored with the rows.
+                                          Defaults to a running counter.
+
+        Returns:
+            int: Number of observations collected
+        """
+        from CCD_xpath_examples import CCDParser
+
+        parser = ccd if isinstance(ccd, CCDParser) else CCDParser(ccd)
+        index = self._next_index(record_index)
+        collected = 0
+
+        for observation in parser.extract_lab_results() + parser.extract_vital_signs():
+            if 'value' not in observation:
+                continue
+
+            self._record_index.append(index)
+            self._source.append(SOURCE_CCD)
+            self._codes.append(observation.get('code', ''))
+            self._values.append(observation['value'])
+            self._units.append(observation.get('unit', ''))
+            self._ranges.append('')
+            self._low.append(observation.get('range_low', ''))
+            self._high.append(observation.get('range_high', ''))
+            self._flags.append(observation.get('interpretation', ''))
+            collected += 1
+
+        return collected
+
+    def _next_index(self, record_index: Optional[int]) -> int:
+        """Return the record index to use and advance the running counter."""
+        index = self._records if record_index is None else record_index
+        self._records = max(self._records, index + 1)
+        return index
+
+    def build(self) -> ObservationBatch:
+        """
+        Convert the collected observations into column arrays.
+
+        Returns:
+            ObservationBatch: Batch with parsed values, bounds and flags
+        """
+        value, value_null = _to_float(self._values)
+        unit_codes, units = _categorize(self._units)
+        code_codes, codes = _categorize(self._codes)
+
+        # Parse each distinct reference range once
+        range_codes, range_categories = _categorize(self._ranges)
+        bounds = np.array([parse_reference_range(text) for text in range_categories],
+                          dtype=np.float64).reshape(-1, 2)
+        low = bounds[range_codes, 0] if len(bounds) else np.empty(0, dtype=np.float64)
+        high = bounds[range_codes, 1] if len(bounds) else np.empty(0, dtype=np.float64)
+
+        # CCD bounds are separate numbers: convert them directly rather than
+        # through a range string, so exponents such as '1e-3' are kept
+        source = np.asarray(self._source, dtype=np.int8)
+        is_ccd = source == SOURCE_CCD
+        if is_ccd.any():
+            low[is_ccd] = _to_float([self._low[i] for i in np.flatnonzero(is_ccd)])[0]
+            high[is_ccd] = _to_float([self._high[i] for i in np.flatnonzero(is_ccd)])[0]
+
+        # Map each distinct reported flag once
+        flag_codes, flag_categories = _categorize([flag.strip().upper() for flag in self._flags])
+        flag_lookup = np.array([ABNORMAL_FLAG_CODES.get(flag, FLAG_UNKNOWN) for flag in flag_categories],
+                               dtype=np.int8)
+        reported_flag = flag_lookup[flag_codes] if len(flag_lookup) else np.empty(0, dtype=np.int8)
+
+        return ObservationBatch(
+            record_index=np.asarray(self._record_index, dtype=np.int32),
+            source=source,
+            value=value,
+            value_null=value_null,
+            unit_codes=unit_codes,
+            units=units,
+            code_codes=code_codes,
+            codes=codes,
+            low=low,
+            high=high,
+            reported_flag=reported_flag
+        )
+
+
+def extract_numeric_observations(hl7_messages: Iterable[Union[str, bytes]] = (),
+                                 ccd_documents: Iterable[Any] = ()) -> ObservationBatch:
+    """
+    Extract numeric observations from HL7 messages and CCDs into one batch.
+
+    HL7 messages are numbered first, then CCD documents, in record_index.
+
+    Args:
+        hl7_messages (Iterable[Union[str, bytes]]): Raw HL7 V2 messages
+        ccd_documents (Iterable[Union[str, CCDParser]]): CCD documents
+
+    Returns:
+        ObservationBatch: Column arrays with computed flags
+    """
+    builder = ObservationBatchBuilder()
+    for message in hl7_messages:
+        builder.add_hl7_message(message)
+    for document in ccd_documents:
+        builder.add_ccd(document)
+    return builder.build()
@@ -0,0 +1,507 @@
+"""
+Patient Index for HL7 V2 and CCD Correlation
+
+This module provides an in-memory patient index that correlates HL7 V2
+messages (PID segment) with CCD documents (recordTarget) by patient, so that
+lookups do not require re-parsing the source data.
+
+Patients are indexed two ways:
+- Identifier index: PID-3 identifier / CCD patientRole id, keyed together with
+  the assigning authority (PID-3.4 / id@root)
+- Blocking index: normalized family name + first initial + date of birth,
+  used to link records that do not share an identifier
+
+Keys are stored as 64-bit hashes rather than strings so that the index stays
+compact when loaded with millions of patients.
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import gzip
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from CCD_xpath_examples import CCDParser
+
+
+_NAME_CLEANUP = re.compile(r'[^A-Z]')
+
+_CCD_PATIENT_ROLE = "//cda:ClinicalDocument/cda:recordTarget/cda:patientRole"
+
+
+class PatientIndexFullError(Exception):
+    """Raised when adding a patient would exceed the index's max_patients."""
+
+
+def _hash_key(*parts: str) -> int:
+    """Hash key parts into a signed 64-bit integer for compact dict keys."""
+    digest = hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Normalize a name component for matching.
+
+    Args:
+        name (str): Raw family or given name
+
+    Returns:
+        str: Upper-cased name with accents, spaces and punctuation removed
+    """
+    if not name:
+        return ''
+    # Fold accented characters (e.g. GARCÍA -> GARCIA) before cleanup
+    folded = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return _NAME_CLEANUP.sub('', folded.upper())
+
+
+def normalize_dob(dob: Optional[str]) -> str:
+    """
+    Normalize a date of birth to YYYYMMDD.
+
+    Accepts HL7 timestamps (19800101, 198001011230) as well as ISO dates
+    (1980-01-01) as produced by CCDParser.
+
+    Args:
+        dob (str): Raw date of birth
+
+    Returns:
+        str: Eight digit date, or an empty string if no date is available
+    """
+    if not dob:
+        return ''
+    digits = re.sub(r'\D', '', dob)
+    return digits[:8] if len(digits) >= 8 else ''
+
+
+def blocking_key(last_name: Optional[str], first_name: Optional[str],
+                 dob: Optional[str]) -> Optional[str]:
+    """
+    Build the demographic blocking key used to link patients.
+
+    Args:
+        last_name (str): Family name
+        first_name (str): Given name
+        dob (str): Date of birth
+
+    Returns:
+        Optional[str]: Key of the form 'FAMILY|F|YYYYMMDD', or None if
+                       family name or date of birth is missing
+    """
+    last = normalize_name(last_name)
+    first = normalize_name(first_name)
+    birth_date = normalize_dob(dob)
+    if not last or not birth_date:
+        return None
+    return f"{last}|{first[:1]}|{birth_date}"
+
+
+def extract_hl7_patient(hl7_message: str) -> Optional[Dict[str, object]]:
+    """
+    Extract patient identity fields from the PID segment of an HL7 message.
+
+    Only the MSH and PID segments are split, using the delimiters declared in
+    MSH-1/MSH-2, so the rest of the message is never parsed.
+
+    Args:
+        hl7_message (str): Raw HL7 V2 message string
+
+    Returns:
+        Optional[Dict[str, object]]: Dictionary with 'identifiers' (list of
+                                     (id, authority) tuples), 'last_name',
+                                     'first_name' and 'date_of_birth', or
+                                     None if the message has no PID segment
+    """
+    if not hl7_message.startswith('MSH') or len(hl7_message) < 8:
+        raise ValueError("HL7 message must start with an MSH segment")
+
+    field_sep = hl7_message[3]
+    component_sep = hl7_message[4]
+    repetition_sep = hl7_message[5]
+    subcomponent_sep = hl7_message[7]
+
+    for line in re.split(r'\r\n|\r|\n', hl7_message):
+        if not line.startswith('PID' + field_sep):
+            continue
+
+        fields = line.split(field_sep)
+
+        identifiers = []
+        if len(fields) > 3 and fields[3]:
+            for repetition in fields[3].split(repetition_sep):
+                components = repetition.split(component_sep)
+                id_number = components[0]
+                # PID-3.4 is a HD data type; use its namespace ID
+                authority = components[3].split(subcomponent_sep)[0] if len(components) > 3 else ''
+                if id_number:
+                    identifiers.append((id_number, authority))
+
+        name = fields[5].split(repetition_sep)[0].split(component_sep) if len(fields) > 5 else []
+
+        return {
+            'identifiers': identifiers,
+            'last_name': name[0] if len(name) > 0 else '',
+            'first_name': name[1] if len(name) > 1 else '',
+            'date_of_birth': fields[7] if len(fields) > 7 else ''
+        }
+
+    return None
+
+
+def extract_ccd_patient(ccd: Union[str, CCDParser]) -> Dict[str, object]:
+    """
+    Extract patient identity fields from the recordTarget of a CCD document.
+
+    Args:
+        ccd (Union[str, CCDParser]): CCD XML content or an existing parser
+
+    Returns:
+        Dict[str, object]: Same structure as extract_hl7_patient(); the
+                           assigning authority is the id@root OID
+    """
+    parser = ccd if isinstance(ccd, CCDParser) else CCDParser(ccd)
+
+    identifiers = []
+    for id_element in parser.xpath_query(f"{_CCD_PATIENT_ROLE}/cda:id"):
+        extension = id_element.get('extension')
+        if extension:
+            identifiers.append((extension, id_element.get('root', '')))
+
+    given_names = parser.xpath_query(f"{_CCD_PATIENT_ROLE}/cda:patient/cda:name/cda:given/text()")
+    family_name = parser.xpath_query(f"{_CCD_PATIENT_ROLE}/cda:patient/cda:name/cda:family/text()")
+    birth_time = parser.xpath_query(f"{_CCD_PATIENT_ROLE}/cda:patient/cda:birthTime/@value")
+
+    return {
+        'identifiers': identifiers,
+        'last_name': str(family_name[0]) if family_name else '',
+        'first_name': str(given_names[0]) if given_names else '',
+        'date_of_birth': str(birth_time[0]) if birth_time else ''
+    }
+
+
+class PatientIndex:
+    """
+    In-memory patient index keyed by identifier and demographic blocking key.
+
+    Each patient is assigned an integer patient number. Demographics are kept
+    in a flat list of tuples, and both indexes map 64-bit key hashes to
+    patient numbers, so memory use grows by a small fixed amount per patient.
+    """
+
+    def __init__(self, max_patients: Optional[int] = None):
+        """
+        Initialize an empty patient index.
+
+        Args:
+            max_patients (int, optional): Upper bound on the number of
+                                          patients held, used to keep the
+                                          index within a fixed memory budget.
+                                          Defaults to unbounded.
+        """
+        self.max_patients = max_patients
+
+        # Patient number -> (last_name, first_name, date_of_birth)
+        self._demographics: List[Tuple[str, str, str]] = []
+        # Patient number -> list of (id, authority) tuples
+        self._identifiers: List[List[Tuple[str, str]]] = []
+        # Patient number -> number of source records merged into the patient
+        self._record_counts: List[int] = []
+
+        # hash(id, authority) -> patient number
+        self._identifier_index: Dict[int, int] = {}
+        # hash(blocking key) -> patient number, or list of patient numbers
+        self._blocking_index: Dict[int, Union[int, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._demographics)
+
+    def add_patient(self, patient: Dict[str, object]) -> int:
+        """
+        Add a patient record, merging it into an existing patient if possible.
+
+        A record is linked to an existing patient when any identifier matches,
+        or otherwise when its blocking key matches exactly one patient that
+        holds no other identifier under the same assigning authority. Records
+        whose identifiers conflict with the candidate (e.g. twins sharing a
+        name initial and date of birth) become a new patient.
+
+        Args:
+            patient (Dict[str, object]): Record as returned by
+                                         extract_hl7_patient() or
+                                         extract_ccd_patient()
+
+        Returns:
+            int: Patient number the record was stored under
+
+        Raises:
+            PatientIndexFullError: If adding a new patient would exceed max_patients
+        """
+        identifiers = list(patient.get('identifiers') or [])
+        last_name = patient.get('last_name') or ''
+        first_name = patient.get('first_name') or ''
+        dob = normalize_dob(patient.get('date_of_birth'))
+        key = blocking_key(last_name, first_name, dob)
+
+        patient_number = None
+        for id_number, authority in identifiers:
+            patient_number = self._identifier_index.get(_hash_key(id_number, authority))
+            if patient_number is not None:
+                break
+
+        if patient_number is None and key is not None:
+            candidates = self._blocking_index.get(_hash_key(key))
+            if isinstance(candidates, int) and not self._conflicts(candidates, identifiers):
+                patient_number = candidates
+
+        if patient_number is None:
+            if self.max_patients is not None and len(self) >= self.max_patients:
+                raise PatientIndexFullError(f"Patient index is full ({self.max_patients} patients)")
+            patient_number = len(self._demographics)
+            self._demographics.append((last_name, first_name, dob))
+            self._identifiers.append([])
+            self._record_counts.append(0)
+            if key is not None:
+                self._add_blocking_entry(_hash_key(key), patient_number)
+        else:
+            # Fill in demographics the existing patient did not have, and
+            # index the blocking key if they now produce a new one
+            known = self._demographics[patient_number]
+            merged = (known[0] or last_name, known[1] or first_name, known[2] or dob)
+            if merged != known:
+                self._demographics[patient_number] = merged
+                old_key = blocking_key(*known)
+                new_key = blocking_key(*merged)
+                if new_key != old_key:
+                    # Keep the blocking index as load() would rebuild it
+                    if old_key is not None:
+                        self._remove_blocking_entry(_hash_key(old_key), patient_number)
+                    if new_key is not None:
+                        self._add_blocking_entry(_hash_key(new_key), patient_number)
+
+        for id_number, authority in identifiers:
+            id_key = _hash_key(id_number, authority)
+            if id_key not in self._identifier_index:
+                self._identifier_index[id_key] = patient_number
+                self._identifiers[patient_number].append((id_number, authority))
+
+        self._record_counts[patient_number] += 1
+        return patient_number
+
+    def _conflicts(self, patient_number: int, identifiers: List[Tuple[str, str]]) -> bool:
+        """Check whether identifiers use an assigning authority the patient already holds."""
+        known_authorities = {authority for _, authority in self._identifiers[patient_number]}
+        return any(authority in known_authorities for _, authority in identifiers)
+
+    def _add_blocking_entry(self, key_hash: int, patient_number: int) -> None:
+        """Add a patient number under a blocking key hash."""
+        existing = self._blocking_index.get(key_hash)
+        if existing is None:
+            self._blocking_index[key_hash] = patient_number
+        elif isinstance(existing, int):
+            self._blocking_index[key_hash] = [existing, patient_number]
+        else:
+            existing.append(patient_number)
+
+    def _remove_blocking_entry(self, key_hash: int, patient_number: int) -> None:
+        """Remove a patient number from a blocking key hash."""
+        existing = self._blocking_index.get(key_hash)
+        if existing == patient_number:
+            del self._blocking_index[key_hash]
+        elif isinstance(existing, list) and patient_number in existing:
+            existing.remove(patient_number)
+            if len(existing) == 1:
+                self._blocking_index[key_hash] = existing[0]
+
+    def add_hl7_message(self, hl7_message: str) -> Optional[int]:
+        """
+        Index the patient from an HL7 V2 message.
+
+        Args:
+            hl7_message (str): Raw HL7 V2 message string
+
+        Returns:
+            Optional[int]: Patient number, or None if the message has no PID
+        """
+        patient = extract_hl7_patient(hl7_message)
+        if patient is None:
+            return None
+        return self.add_patient(patient)
+
+    def add_ccd(self, ccd: Union[str, CCDParser]) -> int:
+        """
+        Index the patient from a CCD document.
+
+        Args:
+            ccd (Union[str, CCDParser]): CCD XML content or an existing parser
+
+        Returns:
+            int: Patient number
+        """
+        return self.add_patient(extract_ccd_patient(ccd))
+
+    def bulk_load(self, hl7_messages: Iterable[str] = (),
+                  ccd_documents: Iterable[Union[str, CCDParser]] = ()) -> Dict[str, int]:
+        """
+        Load a stream of HL7 messages and CCD documents into the index.
+
+        Records that fail to parse are counted as failed. Once the index
+        holds max_patients, records that would create a new patient are
+        counted as skipped and the load continues, so records for patients
+        already in the index are still merged.
+
+        Args:
+            hl7_messages (Iterable[str]): Raw HL7 V2 messages
+            ccd_documents (Iterable[Union[str, CCDParser]]): CCD documents
+
+        Returns:
+            Dict[str, int]: Counts of loaded, failed and skipped records
+        """
+        stats = {'hl7_loaded': 0, 'hl7_failed': 0, 'hl7_skipped': 0,
+                 'ccd_loaded': 0, 'ccd_failed': 0, 'ccd_skipped': 0}
+
+        for message in hl7_messages:
+            try:
+                if self.add_hl7_message(message) is not None:
+                    stats['hl7_loaded'] += 1
+                else:
+                    stats['hl7_failed'] += 1
+            except ValueError:
+                stats['hl7_failed'] += 1
+            except PatientIndexFullError:
+                stats['hl7_skipped'] += 1
+
+        for document in ccd_documents:
+            try:
+                self.add_ccd(document)
+                stats['ccd_loaded'] += 1
+            except ValueError:
+                stats['ccd_failed'] += 1
+            except PatientIndexFullError:
+                stats['ccd_skipped'] += 1
+
+        return stats
+
+    def get_patient(self, patient_number: int) -> Dict[str, object]:
+        """
+        Get the indexed data for a patient.
+
+        Args:
+            patient_number (int): Patient number returned by the index
+
+        Returns:
+            Dict[str, object]: Patient demographics and identifiers
+        """
+        last_name, first_name, dob = self._demographics[patient_number]
+        return {
+            'patient_number': patient_number,
+            'identifiers': list(self._identifiers[patient_number]),
+            'last_name': last_name,
+            'first_name': first_name,
+            'date_of_birth': dob,
+            'record_count': self._record_counts[patient_number]
+        }
+
+    def find_by_identifier(self, id_number: str, authority: str = '') -> Optional[Dict[str, object]]:
+        """
+        Look up a patient by identifier and assigning authority.
+
+        Args:
+            id_number (str): Patient identifier (PID-3.1 / id@extension)
+            authority (str): Assigning authority (PID-3.4 / id@root)
+
+        Returns:
+            Optional[Dict[str, object]]: Patient data, or None if not found
+        """
+        patient_number = self._identifier_index.get(_hash_key(id_number, authority))
+        if patient_number is None:
+            return None
+        return self.get_patient(patient_number)
+
+    def find_by_demographics(self, last_name: str, first_name: str,
+                             dob: str) -> List[Dict[str, object]]:
+        """
+        Look up candidate patients by name and date of birth.
+
+        Args:
+            last_name (str): Family name
+            first_name (str): Given name
+            dob (str): Date of birth (HL7 or ISO format)
+
+        Returns:
+            List[Dict[str, object]]: Patients sharing the blocking key
+        """
+        key = blocking_key(last_name, first_name, dob)
+        if key is None:
+            return []
+
+        candidates = self._blocking_index.get(_hash_key(key))
+        if candidates is None:
+            return []
+        if isinstance(candidates, int):
+            candidates = [candidates]
+        return [self.get_patient(patient_number) for patient_number in candidates]
+
+    def save(self, path: str) -> None:
+        """
+        Persist the index to disk as gzip-compressed JSON lines.
+
+        Only the patient records are written; the hash indexes are rebuilt
+        on load.
+
+        Args:
+            path (str): Output file path
+        """
+        with gzip.open(path, 'wt', encoding='utf-8') as output:
+            for patient_number in range(len(self)):
+                last_name, first_name, dob = self._demographics[patient_number]
+                output.write(json.dumps([
+                    last_name,
+                    first_name,
+                    dob,
+                    self._identifiers[patient_number],
+                    self._record_counts[patient_number]
+                ], ensure_ascii=False))
+                output.write('\n')
+
+    @classmethod
+    def load(cls, path: str, max_patients: Optional[int] = None) -> 'PatientIndex':
+        """
+        Load an index previously written with save().
+
+        Args:
+            path (str): Input file path
+            max_patients (int, optional): Upper bound on patients held
+
+        Returns:
+            PatientIndex: Rebuilt patient index
+
+        Raises:
+            PatientIndexFullError: If the file holds more than max_patients
+        """
+        index = cls(max_patients=max_patients)
+
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            for line in source:
+                last_name, first_name, dob, identifiers, record_count = json.loads(line)
+                if index.max_patients is not None and len(index) >= index.max_patients:
+                    raise PatientIndexFullError(f"Patient index is full ({index.max_patients} patients)")
+
+                patient_number = len(index._demographics)
+                identifiers = [tuple(identifier) for identifier in identifiers]
+                index._demographics.append((last_name, first_name, dob))
+                index._identifiers.append(identifiers)
+                index._record_counts.append(record_count)
+
+                for id_number, authority in identifiers:
+                    index._identifier_index[_hash_key(id_number, authority)] = patient_number
+
+                key = blocking_key(last_name, first_name, dob)
+                if key is not None:
+                    index._add_blocking_entry(_hash_key(key), patient_number)
+
+        return index
@@ -0,0 +1,172 @@
+"""
+Unit Tests for the HL7 OBX Parser Message Index and Bytes Input
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import hl7
+import pytest
+
+from HL7_OBX_Parser import (
+    build_message_index,
+    check_obx_subsegments,
+    check_obx_subsegments_by_order,
+    resolve_charset,
+    unescape_hl7,
+    validate_obx_requirements
+)
+
+
+class TestMessageIndex:
+    """Test class for the per-message structural index and order groups."""
+
+    MULTI_ORDER_MESSAGE = "\r".join([
+        "MSH|^~\\&|LAB|FAC|EMR|HOSP|20240815||ORU^R01|MSG1|P|2.5.1|",
+        "PID|1||123^^^HOSPITAL^MR||DOE^JOHN||19800101|M|",
+        "OBR|1|ORDER1|RESULT1|CBC|",
+        "OBX|1|NM|718-7||14.5|g/dL|||||F|",
+        "NTE|1||Comment on hemoglobin",
+        "OBX|2|NM|4544-3||42.5|%|||||F|",
+        "OBR|2|ORDER2|RESULT2|BMP|",
+        "OBX|1|NM|2345-7||95|mg/dL|||||F|"
+    ])
+
+    def test_segment_positions(self):
+        """Test segment type to position lookup."""
+        index = build_message_index(hl7.parse(self.MULTI_ORDER_MESSAGE))
+
+        assert index['segments']['MSH'] == [0]
+        assert index['segments']['OBR'] == [2, 6]
+        assert index['segments']['OBX'] == [3, 5, 7]
+        assert index['segments']['NTE'] == [4]
+
+    def test_order_groups(self):
+        """Test that OBX and NTE segments are grouped under their OBR."""
+        index = build_message_index(hl7.parse(self.MULTI_ORDER_MESSAGE))
+        groups = index['order_groups']
+
+        assert len(groups) == 2
+        assert groups[0]['obr'] == 2
+        assert groups[0]['obx'] == [3, 5]
+        assert groups[0]['nte'] == [4]
+        assert (groups[0]['start'], groups[0]['end']) == (2, 6)
+        assert groups[1]['obx'] == [7]
+
+    def test_check_by_order(self):
+        """Test per-order-group extraction returns one entry per OBR."""
+        order_results = check_obx_subsegments_by_order(self.MULTI_ORDER_MESSAGE)
+
+        assert [group['obx_count'] for group in order_results] == [2, 1]
+        assert all('OBX.15.1' in group['results'] for group in order_results)
+
+    def test_validate_per_order_group(self):
+        """Test that every OBX in a group must carry the required fields."""
+        order_results = [
+            {'order_group': 0, 'obr_position': 2, 'obx_count': 2,
+             'results': {'OBX.15.1': ['LAB', 'LAB'], 'OBX.15.2': ['TECH'], 'OBX.23.1': []}},
+            {'order_group': 1, 'obr_position': 6, 'obx_count': 1,
+             'results': {'OBX.15.1': ['LAB'], 'OBX.15.2': ['TECH'], 'OBX.23.1': []}}
+        ]
+
+        validation = validate_obx_requirements(order_results, ['OBX.15.1', 'OBX.15.2'],
+                                               per_order_group=True)
+
+        assert validation['is_valid'] is False
+        assert validation['invalid_order_groups'] == [0]
+        assert validation['order_groups'][0]['incomplete_fields'] == ['OBX.15.2']
+        assert validation['order_groups'][1]['is_valid'] is True
+
+    def test_empty_order_group_is_valid(self):
+        """Test that an OBR without OBX segments is not reported as missing fields."""
+        message = self.MULTI_ORDER_MESSAGE + "\rOBR|3|ORDER3|RESULT3|LIPID|"
+
+        validation = validate_obx_requirements(check_obx_subsegments_by_order(message),
+                                               ['OBX.15.1'], per_order_group=True)
+
+        assert validation['order_groups'][2]['is_valid'] is True
+        assert validation['order_groups'][2]['missing_fields'] == []
+        assert validation['empty_order_groups'] == [2]
+
+
+class TestBytesInput:
+    """Test class for bytes input and str/bytes parity."""
+
+    @staticmethod
+    def _build_message(charset, producer='INTL_LAB^LABORATOIRE_SP\\XC9\\CIAL', separator='\r'):
+        """Build an ORU message with the given OBX.15 value and MSH-18 charset."""
+        msh = "MSH|^~\\&|LAB|FAC|EMR|HOSP|20240815||ORU^R01|MSG1|P|2.5.1||||||" + charset
+        obx = (['OBX', '1', 'ST', 'X', '', 'value'] + [''] * 9 + [producer] + [''] * 7 +
+               ['PROC\\F\\A\\S\\B^1'])
+        return msh + separator + '|'.join(obx)
+
+    def test_latin1_bytes(self):
+        """Test decoding with an 8859/1 charset declared in MSH-18."""
+        message = self._build_message('8859/1').encode('latin-1')
+
+        results = check_obx_subsegments(message)
+
+        assert results['OBX.15.1'] == ['INTL_LAB']
+        assert results['OBX.15.2'] == ['LABORATOIRE_SPÉCIAL']
+        assert results['OBX.23.1'] == ['PROC|A^B']
+
+    def test_utf8_memoryview(self):
+        """Test memoryview input with a UTF-8 charset declared in MSH-18."""
+        message = self._build_message('UNICODE UTF-8').replace('\\XC9\\', '\\XC389\\')
+
+        results = check_obx_subsegments(memoryview(message.encode('utf-8')))
+
+        assert results['OBX.15.2'] == ['LABORATOIRE_SPÉCIAL']
+
+    @pytest.mark.parametrize('producer, separator', [
+        ('LAB_TECH^TECHNICIAN', '\n'),
+        ('LAB_TECH^TECHNICIAN', '\r\n'),
+        ('AA^BB~CC^DD', '\r'),
+        ('A\\F\\B^C', '\r'),
+        ('\\XC9\\COLE^LAB', '\r')
+    ])
+    def test_str_and_bytes_agree(self, producer, separator):
+        """Test that str and bytes input give the same results."""
+        message = self._build_message('8859/1', producer, separator)
+
+        results = check_obx_subsegments(message)
+
+        assert results == check_obx_subsegments(message.encode('latin-1'))
+        assert len(results['OBX.15.1']) == 1
+        assert results['OBX.23.1'] == ['PROC|A^B']
+
+    @pytest.mark.parametrize('charset, text', [
+        ('GBK', '亅'),
+        ('SHIFT_JIS', '倒'),
+        ('BIG-5', '吜'),
+        ('ISO-2022-JP', '倒')
+    ])
+    def test_multibyte_delimiter_bytes(self, charset, text):
+        """Test characters whose encoding contains a '|' byte in str/bytes parity."""
+        message = self._build_message(charset, text + 'LAB^T')
+
+        results = check_obx_subsegments(message)
+
+        assert results['OBX.15.1'] == [text + 'LAB']
+        assert results == check_obx_subsegments(message.encode(resolve_charset(charset)))
+
+    def test_first_repetition_and_escapes(self):
+        """Test that values come from the first repetition, unescaped."""
+        assert check_obx_subsegments(self._build_message('', 'AA^BB~CC^DD'))['OBX.15.1'] == ['AA']
+        assert check_obx_subsegments(self._build_message('', 'A\\F\\B^C'))['OBX.15.1'] == ['A|B']
+        assert check_obx_subsegments(self._build_message('8859/1', '\\XC9\\COLE'))['OBX.15.1'] == ['ÉCOLE']
+
+    def test_invalid_bytes_message(self):
+        """Test that bytes without an MSH segment are rejected."""
+        with pytest.raises(hl7.ParseException):
+            check_obx_subsegments(b"This is not a valid HL7 message")
+
+    def test_unescape_and_charsets(self):
+        """Test escape sequence handling and MSH-18 charset lookup."""
+        assert unescape_hl7(b'A\\T\\B\\R\\C\\E\\', b'|^~\\&') == 'A&B~C\\'
+        assert unescape_hl7('A\\T\\B\\XC9\\', '|^~\\&', 'latin-1') == 'A&BÉ'
+        assert unescape_hl7(b'\\.br\\', b'|^~\\&') == '\\.br\\'
+        assert resolve_charset('8859/1') == 'latin-1'
+        assert resolve_charset('UNICODE UTF-16') is None
+        assert resolve_charset('UTF-32') is None
+        assert resolve_charset('') is None
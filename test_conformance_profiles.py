@@ -0,0 +1,141 @@
+"""
+Unit Tests for Compiled Conformance Profiles
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import os
+
+import pytest
+
+from conformance_profiles import ConformanceProfile, ProfileRegistry, check_conformance
+from sample_HL7_messages import SAMPLE_ADT_MESSAGE, SAMPLE_ORU_MESSAGE
+
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), 'profiles')
+
+LAB_MESSAGE = "\r".join([
+    "MSH|^~\\&|LAB_SYSTEM|HOSPITAL_LAB|EMR|HOSP|20240815||ORU^R01^ORU_R01|MSG1|P|2.5.1|",
+    "PID|1||123^^^HOSPITAL^MR||DOE^JOHN||19800101|M|",
+    "OBR|1|ORDER1|RESULT1|CBC^COMPLETE BLOOD COUNT|",
+    "OBX|1|NM|718-7^HEMOGLOBIN^LN||14.5|g/dL|||||F||||LAB_TECH^TECHNICIAN||||||||PROC_1^1",
+    "OBX|2|NM|4544-3^HEMATOCRIT^LN||42.5~43.0|%|||||Z||||LAB_TECH||||||||PROC_2^1"
+])
+
+
+@pytest.fixture
+def registry():
+    """Fixture providing a registry loaded with the bundled profiles."""
+    profiles = ProfileRegistry()
+    profiles.load_directory(PROFILE_DIR)
+    return profiles
+
+
+class TestProfileRegistry:
+    """Test class for profile lookup."""
+
+    def test_lookup_by_type_and_sender(self, registry):
+        """Test that lookup matches MSH-9 and MSH-3, ignoring MSH-9.3."""
+        assert registry.lookup('ORU^R01^ORU_R01', 'LAB_SYSTEM', 'ANY').name == 'oru-r01-lab'
+        assert registry.lookup('ORU^R01', 'RADIOLOGY', 'ANY') is None
+        assert registry.lookup('ADT^A08', 'ADT_SYSTEM', 'MAIN_HOSPITAL').name == 'adt-a08'
+
+    def test_specific_profile_wins(self):
+        """Test that a sender-specific profile overrides the wildcard one."""
+        general = ConformanceProfile({'name': 'general', 'message_type': 'ORU^R01'})
+        specific = ConformanceProfile({'name': 'specific', 'message_type': 'ORU^R01',
+                                       'sending_facility': 'HOSPITAL_LAB'})
+        registry = ProfileRegistry([general, specific])
+
+        assert registry.lookup('ORU^R01', 'LAB', 'HOSPITAL_LAB').name == 'specific'
+        assert registry.lookup('ORU^R01', 'LAB', 'OTHER').name == 'general'
+
+    @pytest.mark.parametrize('path', ['OBX-15', 'OBX.15.0', 'OBX.0'])
+    def test_invalid_field_path(self, path):
+        """Test that malformed or zero-based field paths are rejected when compiling."""
+        with pytest.raises(ValueError):
+            ConformanceProfile({'message_type': 'ORU^R01',
+                                'segments': {'OBX': {'fields': {path: {}}}}})
+
+
+    @pytest.mark.parametrize('path', ['MSH.1', 'MSH.2', 'MSH.2.1'])
+    def test_delimiter_fields_rejected(self, path):
+        """Test that MSH-1 and MSH-2, which hold the delimiters, cannot be checked."""
+        with pytest.raises(ValueError, match='delimiters'):
+            ConformanceProfile({'message_type': 'ORU^R01',
+                                'segments': {'MSH': {'fields': {path: {'required': True}}}}})
+
+
+class TestCheckConformance:
+    """Test class for single-pass extraction and conformance checks."""
+
+    def test_per_segment_violations(self, registry):
+        """Test that violations identify the segment occurrence and rule."""
+        report = check_conformance(LAB_MESSAGE, registry)
+        violations = {(v['occurrence'], v['field'], v['rule']) for v in report['violations']
+                      if v['segment'] == 'OBX'}
+
+        assert report['profile'] == 'oru-r01-lab'
+        assert report['is_valid'] is False
+        assert violations == {
+            (2, 'OBX.5', 'max_repetitions'),
+            (2, 'OBX.11', 'allowed_values'),
+            (2, 'OBX.15.2', 'required')
+        }
+        assert report['results']['OBX.15.1'] == ['LAB_TECH', 'LAB_TECH']
+        assert report['results']['OBX.23.1'] == ['PROC_1', 'PROC_2']
+
+    def test_bytes_input(self, registry):
+        """Test that bytes input gives the same report."""
+        assert check_conformance(LAB_MESSAGE.encode('ascii'), registry) == \
+            check_conformance(LAB_MESSAGE, registry)
+
+    def test_cardinality(self, registry):
+        """Test segment cardinality rules from the ADT profile."""
+        message = SAMPLE_ADT_MESSAGE.replace('\nPV1', '\nZPV')
+
+        report = check_conformance(message, registry)
+
+        assert {'segment': 'PV1', 'rule': 'cardinality'}.items() <= report['violations'][-1].items()
+
+    def test_no_matching_profile(self):
+        """Test that messages without a profile are not validated."""
+        report = check_conformance(SAMPLE_ORU_MESSAGE, ProfileRegistry())
+
+        assert report['profile'] is None
+        assert report['is_valid'] is None
+        assert report['segment_counts']['OBX'] == 3
+
+    def test_from_required_fields(self):
+        """Test building a profile from a legacy required-field list."""
+        profile = ConformanceProfile.from_required_fields(['OBX.15.1', 'OBX.15.2'])
+
+        report = check_conformance(LAB_MESSAGE, profile)
+
+        assert [v['occurrence'] for v in report['violations']] == [2]
+
+    @pytest.mark.parametrize('charset, producer, encoding', [
+        ('', 'ÉCOLE', None),
+        ('8859/1', 'ÉCOLE', 'latin-1'),
+        ('UNICODE UTF-8', 'ÉCOLE', 'utf-8'),
+        ('8859/1', '\\XC9\\COLE', None),
+        ('8859/1', '\\XC9\\COLE', 'latin-1')
+    ])
+    def test_values_checked_after_decoding(self, charset, producer, encoding):
+        """Test that encoding and escapes do not change the verdict."""
+        profile = ConformanceProfile({
+            'message_type': 'ORU^R01',
+            'segments': {'OBX': {'fields': {
+                'OBX.15.1': {'allowed_values': ['ÉCOLE'], 'max_length': 5}
+            }}}
+        })
+        message = "\r".join([
+            "MSH|^~\\&|LAB|FAC|EMR|HOSP|20240815||ORU^R01|MSG1|P|2.5.1||||||" + charset,
+            "OBX|1|NM|718-7||14.5|g/dL|||||F||||" + producer + "^TECH"
+        ])
+
+        report = check_conformance(message.encode(encoding) if encoding else message, profile)
+
+        assert report['violations'] == []
+        assert report['results']['OBX.15.1'] == ['ÉCOLE']
@@ -0,0 +1,132 @@
+"""
+Unit Tests for the HL7 / CCD Command-Line Scanner
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import csv
+import io
+import json
+import tarfile
+import zipfile
+
+from hl7_ccd_records import split_hl7_messages
+from hl7_ccd_scanner import ARCHIVE_MEMBERS_PER_TASK, iter_scan_tasks, main
+from sample_HL7_messages import SAMPLE_ORU_MESSAGE, SAMPLE_ADT_MESSAGE
+
+
+class TestScannerInputs:
+    """Test class for source discovery and message splitting."""
+
+    def test_split_batch_file(self):
+        """Test splitting a file with several newline-separated messages."""
+        messages = split_hl7_messages(SAMPLE_ORU_MESSAGE + '\n' + SAMPLE_ADT_MESSAGE + '\n')
+
+        assert len(messages) == 2
+        assert all(message.startswith('MSH') for message in messages)
+        assert '\n' not in messages[0]
+        assert messages[0].count('\r') == SAMPLE_ORU_MESSAGE.count('\n')
+
+    def test_iter_directory_and_archive(self, tmp_path):
+        """Test that directories and zip members are expanded."""
+        (tmp_path / 'a.hl7').write_text(SAMPLE_ORU_MESSAGE)
+        (tmp_path / 'notes.pdf').write_text('ignored')
+        with zipfile.ZipFile(tmp_path / 'batch.zip', 'w') as archive:
+            archive.writestr('inner/b.hl7', SAMPLE_ADT_MESSAGE)
+
+        tasks = list(iter_scan_tasks([str(tmp_path)]))
+
+        assert (str(tmp_path / 'a.hl7'), None, None, None) in tasks
+        assert (str(tmp_path / 'batch.zip'), ['inner/b.hl7'], None, None) in tasks
+        assert len(tasks) == 2
+
+    def test_corrupt_archives_reported(self, tmp_path):
+        """Test that corrupt archives become error records and the scan continues."""
+        (tmp_path / 'a.hl7').write_text(SAMPLE_ORU_MESSAGE)
+        (tmp_path / 'bad.zip').write_bytes(b'not a zip file')
+        (tmp_path / 'bad.tar.gz').write_bytes(b'not a tar file')
+        output = tmp_path / 'out.jsonl'
+
+        status = main([str(tmp_path), '-w', '1', '-q', '-o', str(output)])
+        records = {record['source']: record for record in map(json.loads, output.read_text().splitlines())}
+
+        assert status == 1
+        assert 'error' in records[str(tmp_path / 'bad.zip')]
+        assert 'error' in records[str(tmp_path / 'bad.tar.gz')]
+        assert records[str(tmp_path / 'a.hl7')]['sending_application'] == 'LAB_SYSTEM'
+
+    def test_archive_tasks_read_once(self, tmp_path):
+        """Test that tar members are streamed into tasks and zip members batched."""
+        count = ARCHIVE_MEMBERS_PER_TASK + 1
+        with tarfile.open(tmp_path / 'batch.tar.gz', 'w:gz') as archive:
+            for index in range(count):
+                data = SAMPLE_ORU_MESSAGE.encode('utf-8')
+                info = tarfile.TarInfo(f'msg{index}.hl7')
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        with zipfile.ZipFile(tmp_path / 'batch.zip', 'w') as archive:
+            for index in range(count):
+                archive.writestr(f'msg{index}.hl7', SAMPLE_ADT_MESSAGE)
+
+        tasks = list(iter_scan_tasks([str(tmp_path / 'batch.tar.gz'), str(tmp_path / 'batch.zip')]))
+
+        assert [len(members) for _, members, _, _ in tasks] == [ARCHIVE_MEMBERS_PER_TASK, 1,
+                                                             ARCHIVE_MEMBERS_PER_TASK, 1]
+        assert tasks[0][2][0] == SAMPLE_ORU_MESSAGE.encode('utf-8')
+        assert tasks[2][2] is None
+
+
+class TestScannerOutput:
+    """Test class for the command-line entry point."""
+
+    def test_jsonl_output(self, tmp_path):
+        """Test JSON Lines output with one record per message."""
+        (tmp_path / 'batch.hl7').write_text(SAMPLE_ORU_MESSAGE + '\n' + SAMPLE_ADT_MESSAGE)
+        output = tmp_path / 'out.jsonl'
+
+        status = main([str(tmp_path / 'batch.hl7'), '-w', '1', '-q', '-o', str(output)])
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+
+        assert status == 0
+        assert [record['sending_application'] for record in records] == ['LAB_SYSTEM', 'ADT_SYSTEM']
+        assert 'validation' in records[0]
+
+    def test_csv_output_with_errors(self, tmp_path):
+        """Test CSV output and a failing exit status for bad input."""
+        (tmp_path / 'bad.hl7').write_text('not an hl7 message')
+        output = tmp_path / 'out.csv'
+
+        status = main([str(tmp_path), '-w', '1', '-q', '-f', 'csv', '-o', str(output)])
+        with open(output, newline='') as source:
+            rows = list(csv.DictReader(source))
+
+        assert status == 1
+        assert len(rows) == 1
+        assert rows[0]['error']
+
+    def test_tar_archive_with_workers(self, tmp_path):
+        """Test scanning tar members in a worker pool."""
+        with tarfile.open(tmp_path / 'batch.tgz', 'w:gz') as archive:
+            for index, message in enumerate([SAMPLE_ORU_MESSAGE, SAMPLE_ADT_MESSAGE]):
+                data = message.encode('utf-8')
+                info = tarfile.TarInfo(f'msg{index}.hl7')
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        output = tmp_path / 'out.jsonl'
+
+        status = main([str(tmp_path / 'batch.tgz'), '-w', '2', '-q', '-o', str(output)])
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+
+        assert status == 0
+        assert sorted(record['source'].split('!')[1] for record in records) == ['msg0.hl7', 'msg1.hl7']
+
+    def test_summary_counts_obx_segments(self, tmp_path):
+        """Test that the summary reports the OBX segments of each sender."""
+        (tmp_path / 'batch.hl7').write_text(SAMPLE_ORU_MESSAGE)
+        output = tmp_path / 'summary.json'
+
+        main([str(tmp_path / 'batch.hl7'), '-w', '1', '-q', '-f', 'summary', '-o', str(output)])
+        summary = json.loads(output.read_text())
+
+        assert summary['senders'][0]['obx_segments'] == 3
@@ -0,0 +1,109 @@
+"""
+Unit Tests for the Staged HL7/CCD Pipeline
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import time
+
+from hl7_pipeline import Pipeline, build_hl7_pipeline
+from sample_HL7_messages import SAMPLE_ORU_MESSAGE, SAMPLE_ADT_MESSAGE
+
+
+class TestPipeline:
+    """Test class for the generic pipeline."""
+
+    def test_stages_run_in_order(self):
+        """Test that every item passes through every stage."""
+        output = []
+        pipeline = (Pipeline()
+                    .add_stage('double', lambda x: x * 2, workers=2)
+                    .add_stage('split', lambda x: [x, x + 1], expand=True)
+                    .add_stage('write', output.append))
+
+        metrics = pipeline.run(range(10))
+
+        assert sorted(output) == sorted(v for x in range(10) for v in (x * 2, x * 2 + 1))
+        assert metrics['write']['processed'] == 20
+
+    def test_backpressure_bounds_queues(self):
+        """Test that a slow sink keeps upstream queues within their bound."""
+        output = []
+
+        def slow_sink(item):
+            time.sleep(0.001)
+            output.append(item)
+
+        pipeline = (Pipeline()
+                    .add_stage('pass', lambda x: x, queue_size=3)
+                    .add_stage('write', slow_sink, queue_size=3))
+        metrics = pipeline.run(range(50))
+
+        assert len(output) == 50
+        assert metrics['pass']['max_queue_depth'] <= 3
+        assert metrics['write']['max_queue_depth'] <= 3
+
+    def test_errors_are_counted_and_dropped(self):
+        """Test that failing items are reported and do not stop the pipeline."""
+        output, errors = [], []
+        pipeline = Pipeline(on_error=lambda stage, item, e: errors.append((stage, item)))
+        pipeline.add_stage('invert', lambda x: 1 / x).add_stage('write', output.append)
+
+        metrics = pipeline.run([1, 0, 2])
+
+        assert sorted(output) == [0.5, 1.0]
+        assert errors == [('invert', 0)]
+        assert metrics['invert']['errors'] == 1
+
+    def test_failing_callback_and_generator_do_not_hang(self):
+        """Test that a raising on_error or expand iterable still lets join() finish."""
+        def raise_error(stage, item, e):
+            raise RuntimeError('callback failed')
+
+        def bad_expand(x):
+            if x == 1:
+                raise ValueError('bad item')
+            yield x
+
+        output = []
+        pipeline = Pipeline(on_error=raise_error)
+        pipeline.add_stage('invert', lambda x: 1 / x)
+        pipeline.add_stage('expand', bad_expand, expand=True)
+        pipeline.add_stage('not_iterable', lambda x: x, expand=True)
+        pipeline.add_stage('write', output.append)
+
+        pipeline.start([1, 0, 2])
+
+        assert pipeline.join(timeout=5)
+        assert output == []
+        assert [pipeline.metrics()[name]['errors'] for name in ('invert', 'expand', 'not_iterable')] == [1, 1, 1]
+
+
+    def test_process_stage_batches(self):
+        """Test that a process stage handles batched items and per-item errors."""
+        results = []
+        pipeline = (Pipeline()
+                    .add_stage('parse', int, workers=2, executor='process', batch_size=4)
+                    .add_stage('collect', results.append))
+
+        metrics = pipeline.run([str(n) for n in range(10)] + ['not a number'])
+
+        assert sorted(results) == list(range(10))
+        assert metrics['parse']['processed'] == 11
+        assert metrics['parse']['errors'] == 1
+
+
+class TestHL7Pipeline:
+    """Test class for the prebuilt HL7 pipeline."""
+
+    def test_hl7_files_to_validated_records(self, tmp_path):
+        """Test read -> extract (processes) -> validate -> write."""
+        path = tmp_path / 'batch.hl7'
+        path.write_text(SAMPLE_ORU_MESSAGE + '\n' + SAMPLE_ADT_MESSAGE)
+        records = []
+
+        build_hl7_pipeline(records.append, parse_workers=2).run([str(path)])
+
+        assert sorted(r['sending_application'] for r in records) == ['ADT_SYSTEM', 'LAB_SYSTEM']
+        assert all('validation' in record for record in records)
@@ -0,0 +1,125 @@
+"""
+Unit Tests for Streaming OBX Conformance Statistics
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import pickle
+
+from obx_conformance_stats import (
+    HyperLogLog,
+    SpaceSaving,
+    OBXConformanceAggregator,
+    OTHER_SENDER,
+    extract_sender
+)
+from sample_HL7_messages import SAMPLE_ORU_MESSAGE
+
+
+COMPLETE = {'OBX.15.1': ['LAB_TECH', 'CENTRAL_LAB'], 'OBX.15.2': ['TECH'], 'OBX.23.1': ['P1']}
+MISSING_PRODUCER = {'OBX.15.1': [], 'OBX.15.2': [], 'OBX.23.1': ['P1']}
+
+
+class TestSketches:
+    """Test class for the fixed-size sketches."""
+
+    def test_hyperloglog_estimate(self):
+        """Test that the distinct count estimate is within a few percent."""
+        sketch = HyperLogLog()
+        for i in range(5000):
+            sketch.add(f"PRODUCER_{i % 2000}")
+
+        assert abs(sketch.count() - 2000) < 200
+
+    def test_hyperloglog_merge(self):
+        """Test that merged sketches estimate the union."""
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(1000):
+            first.add(f"A{i}")
+            second.add(f"B{i}")
+        first.merge(second)
+
+        assert abs(first.count() - 2000) < 200
+
+    def test_space_saving_top(self):
+        """Test that frequent items survive eviction."""
+        counter = SpaceSaving(capacity=3)
+        for item in ['a'] * 10 + ['b'] * 5 + ['c', 'd', 'e', 'f']:
+            counter.add(item)
+
+        assert [item for item, _ in counter.top(2)] == ['a', 'b']
+
+    def test_space_saving_merge_keeps_upper_bounds(self):
+        """Test that an item evicted on one side still gets that side's floor."""
+        first, second = SpaceSaving(capacity=2), SpaceSaving(capacity=2)
+        for item in ['a'] * 5 + ['b'] * 4:
+            first.add(item)
+        for item in ['c'] * 6 + ['a'] * 3 + ['b'] * 3:
+            second.add(item)
+        true_counts = {'a': 8, 'b': 7, 'c': 6}
+
+        first.merge(second)
+
+        assert all(count >= true_counts[item] for item, count in first.top())
+        assert 'a' in dict(first.top())
+
+
+class TestAggregator:
+    """Test class for the per-sender aggregator."""
+
+    def test_extract_sender(self):
+        """Test MSH-3 and MSH-4 extraction."""
+        assert extract_sender(SAMPLE_ORU_MESSAGE) == ('LAB_SYSTEM', 'HOSPITAL_LAB')
+
+    def test_presence_rates_and_missing_combinations(self):
+        """Test per-sender presence rates and top missing combinations."""
+        aggregator = OBXConformanceAggregator()
+        aggregator.add('LAB', 'FAC', COMPLETE)
+        aggregator.add('LAB', 'FAC', MISSING_PRODUCER)
+
+        report = aggregator.report()
+
+        assert len(report) == 1
+        assert report[0]['messages'] == 2
+        assert report[0]['valid_rate'] == 0.5
+        assert report[0]['presence_rates']['OBX.15.1'] == 0.5
+        assert report[0]['presence_rates']['OBX.23.1'] == 1.0
+        assert report[0]['distinct_producer_ids'] == 2
+        assert report[0]['top_missing_combinations'] == [('OBX.15.1+OBX.15.2', 1)]
+
+    def test_obx_presence_rates(self):
+        """Test that per-OBX presence counts OBX segments, not messages."""
+        aggregator = OBXConformanceAggregator()
+        partial = {'OBX.15.1': ['LAB'], 'OBX.15.2': ['TECH'], 'OBX.23.1': ['P1'] * 10}
+        aggregator.add('LAB', 'FAC', partial, obx_count=10)
+
+        entry = aggregator.report()[0]
+
+        assert entry['presence_rates']['OBX.15.1'] == 1.0
+        assert entry['obx_presence_rates']['OBX.15.1'] == 0.1
+        assert entry['obx_presence_rates']['OBX.23.1'] == 1.0
+
+    def test_merge_across_workers(self):
+        """Test merging pickled aggregators from separate workers."""
+        first, second = OBXConformanceAggregator(), OBXConformanceAggregator()
+        first.add('LAB', 'FAC', COMPLETE)
+        second.add('LAB', 'FAC', MISSING_PRODUCER)
+        second.add('RAD', 'FAC', COMPLETE)
+
+        first.merge(pickle.loads(pickle.dumps(second)))
+        report = {(entry['sending_application'], entry['sending_facility']): entry
+                  for entry in first.report()}
+
+        assert report[('LAB', 'FAC')]['messages'] == 2
+        assert report[('RAD', 'FAC')]['messages'] == 1
+
+    def test_max_senders(self):
+        """Test that senders beyond the limit are grouped together."""
+        aggregator = OBXConformanceAggregator(max_senders=1)
+        aggregator.add('LAB', 'FAC', COMPLETE)
+        aggregator.add('RAD', 'FAC', COMPLETE)
+        aggregator.add('ADT', 'FAC', COMPLETE)
+
+        assert set(aggregator.senders) == {('LAB', 'FAC'), OTHER_SENDER}
+        assert aggregator.senders[OTHER_SENDER].messages == 2
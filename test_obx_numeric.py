@@ -0,0 +1,137 @@
+"""
+Unit Tests for Vectorized Numeric Observation Extraction
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import numpy as np
+
+from obx_numeric import (
+    FLAG_HIGH,
+    FLAG_LOW,
+    FLAG_NORMAL,
+    FLAG_UNKNOWN,
+    SOURCE_CCD,
+    extract_numeric_observations,
+    parse_reference_range
+)
+from sample_HL7_messages import SAMPLE_ORU_MESSAGE, SAMPLE_COMPLEX_MESSAGE
+
+
+SAMPLE_RESULTS_CCD = """<ClinicalDocument xmlns="urn:hl7-org:v3">
+  <component><structuredBody>
+    <component><section>
+      <code code="30954-2"/>
+      <entry><organizer><component><observation>
+        <code code="718-7" displayName="Hemoglobin"/>
+        <value value="10.1" unit="g/dL"/>
+        <interpretationCode code="L"/>
+        <referenceRange><observationRange><value>
+          <low value="12.0"/><high value="16.0"/>
+        </value></observationRange></referenceRange>
+      </observation></component></organizer></entry>
+    </section></component>
+    <component><section>
+      <code code="8716-3"/>
+      <entry><organizer><component><observation>
+        <code code="8867-4" displayName="Heart rate"/>
+        <value value="72" unit="/min"/>
+      </observation></component></organizer></entry>
+    </section></component>
+  </structuredBody></component>
+</ClinicalDocument>"""
+
+
+class TestReferenceRanges:
+    """Test class for OBX-7 reference range parsing."""
+
+    def test_parse_ranges(self):
+        """Test bounded, one-sided and unparseable ranges."""
+        assert parse_reference_range('12.0-16.0') == (12.0, 16.0)
+        assert parse_reference_range('-1.5 - 2') == (-1.5, 2.0)
+        assert parse_reference_range('<5')[1] == 5.0
+        assert parse_reference_range('>=60')[0] == 60.0
+        assert np.isnan(parse_reference_range('negative')).all()
+
+
+class TestObservationBatch:
+    """Test class for batch extraction and vectorized flagging."""
+
+    def test_hl7_numeric_observations(self):
+        """Test that only NM-type OBX segments become rows."""
+        batch = extract_numeric_observations([SAMPLE_ORU_MESSAGE, SAMPLE_COMPLEX_MESSAGE])
+
+        assert len(batch) == 3
+        np.testing.assert_array_equal(batch.value, [14.5, 42.5, 7.2])
+        np.testing.assert_array_equal(batch.low, [12.0, 36.0, 4.5])
+        assert list(batch.units[batch.unit_codes]) == ['g/dL', '%', '10*3/uL']
+        assert (batch.computed_flag == FLAG_NORMAL).all()
+        assert not batch.flag_mismatch.any()
+
+    def test_bytes_messages_are_unescaped(self):
+        """Test that bytes and str messages give the same unescaped rows."""
+        message = SAMPLE_ORU_MESSAGE.replace('|10*3/uL|', '|10\\S\\3/uL|')
+        from_str = extract_numeric_observations([message])
+        from_bytes = extract_numeric_observations([message.encode('utf-8')])
+
+        assert list(from_str.units[from_str.unit_codes]) == ['g/dL', '%', '10^3/uL']
+        assert list(from_bytes.units[from_bytes.unit_codes]) == ['g/dL', '%', '10^3/uL']
+        np.testing.assert_array_equal(from_bytes.value, from_str.value)
+
+    def test_flags_and_mismatches(self):
+        """Test abnormal flags, null values and OBX-8 disagreement."""
+        message = (SAMPLE_ORU_MESSAGE
+                   .replace('|14.5|', '|18.0|')
+                   .replace('|42.5|', '|30.1|')
+                   .replace('|7.2|', '|pending|'))
+
+        batch = extract_numeric_observations([message])
+
+        assert list(batch.computed_flag) == [FLAG_HIGH, FLAG_LOW, FLAG_UNKNOWN]
+        assert list(batch.value_null) == [False, False, True]
+        assert list(batch.flag_mismatch) == [True, True, False]
+
+    def test_non_finite_values_are_null(self):
+        """Test that Infinity and NaN results are null, not flagged."""
+        message = (SAMPLE_ORU_MESSAGE
+                   .replace('|14.5|', '|Infinity|')
+                   .replace('|42.5|', '|nan|'))
+
+        batch = extract_numeric_observations([message])
+
+        assert list(batch.value_null) == [True, True, False]
+        assert np.isnan(batch.value[:2]).all()
+        assert list(batch.computed_flag) == [FLAG_UNKNOWN, FLAG_UNKNOWN, FLAG_NORMAL]
+
+    def test_ccd_observations(self):
+        """Test lab results and vital signs from a CCD fill the same arrays."""
+        batch = extract_numeric_observations([SAMPLE_ORU_MESSAGE], [SAMPLE_RESULTS_CCD])
+        from_ccd = batch.source == SOURCE_CCD
+
+        assert from_ccd.sum() == 2
+        hemoglobin = batch.select('718-7') & from_ccd
+        assert batch.value[hemoglobin][0] == 10.1
+        assert batch.computed_flag[hemoglobin][0] == FLAG_LOW
+        assert not batch.flag_mismatch[hemoglobin][0]
+        assert list(batch.record_index[from_ccd]) == [1, 1]
+
+    def test_ccd_bounds_with_exponents(self):
+        """Test that CCD bounds are used as numbers, including exponents."""
+        document = (SAMPLE_RESULTS_CCD
+                    .replace('<low value="12.0"/>', '<low value="1.2e1"/>')
+                    .replace('<high value="16.0"/>', '<high value="1.6E+1"/>'))
+
+        batch = extract_numeric_observations(ccd_documents=[document])
+        hemoglobin = batch.select('718-7')
+
+        assert batch.low[hemoglobin][0] == 12.0
+        assert batch.high[hemoglobin][0] == 16.0
+        assert batch.computed_flag[hemoglobin][0] == FLAG_LOW
+
+    def test_empty_batch(self):
+        """Test that an empty batch builds with empty arrays."""
+        batch = extract_numeric_observations([])
+
+        assert len(batch) == 0
+        assert batch.computed_flag.dtype == np.int8
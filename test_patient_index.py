@@ -0,0 +1,127 @@
+"""
+Unit Tests for the HL7/CCD Patient Index
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import pytest
+
+from patient_index import PatientIndex, PatientIndexFullError, blocking_key, extract_hl7_patient
+from sample_HL7_messages import (
+    SAMPLE_ORU_MESSAGE,
+    SAMPLE_ADT_MESSAGE,
+    SAMPLE_INTERNATIONAL_MESSAGE
+)
+
+
+SAMPLE_CCD = """<?xml version="1.0" encoding="UTF-8"?>
+<ClinicalDocument xmlns="urn:hl7-org:v3">
+  <recordTarget>
+    <patientRole>
+      <id extension="987654" root="2.16.840.1.113883.19.5"/>
+      <patient>
+        <name><given>John</given><family>Doe</family></name>
+        <administrativeGenderCode code="M" displayName="Male"/>
+        <birthTime value="19800101"/>
+      </patient>
+    </patientRole>
+  </recordTarget>
+</ClinicalDocument>"""
+
+
+class TestPatientExtraction:
+    """Test class for PID and blocking key extraction."""
+
+    def test_extract_pid(self):
+        """Test PID-3, PID-5 and PID-7 extraction."""
+        patient = extract_hl7_patient(SAMPLE_ORU_MESSAGE)
+
+        assert patient['identifiers'] == [('123456789', 'HOSPITAL')]
+        assert patient['last_name'] == 'DOE'
+        assert patient['first_name'] == 'JOHN'
+        assert patient['date_of_birth'] == '19800101'
+
+    def test_blocking_key_normalization(self):
+        """Test that accents, case and date formats normalize to one key."""
+        assert blocking_key('García', 'maría', '1985-12-15') == 'GARCIA|M|19851215'
+        assert blocking_key('GARCIA', 'MARIA', '19851215') == 'GARCIA|M|19851215'
+        assert blocking_key('', 'MARIA', '19851215') is None
+
+
+class TestPatientIndex:
+    """Test class for PatientIndex lookups and persistence."""
+
+    def test_identifier_lookup(self):
+        """Test lookup by identifier and assigning authority."""
+        index = PatientIndex()
+        index.bulk_load([SAMPLE_ORU_MESSAGE, SAMPLE_ADT_MESSAGE, SAMPLE_INTERNATIONAL_MESSAGE])
+
+        assert len(index) == 3
+        assert index.find_by_identifier('123456792', 'HOSPITAL')['last_name'] == 'WILSON'
+        assert index.find_by_identifier('123456792', 'OTHER') is None
+
+    def test_ccd_linked_by_demographics(self):
+        """Test that a CCD with a different identifier links by name and DOB."""
+        index = PatientIndex()
+        hl7_number = index.add_hl7_message(SAMPLE_ORU_MESSAGE)
+        ccd_number = index.add_ccd(SAMPLE_CCD)
+
+        assert hl7_number == ccd_number
+        patient = index.find_by_identifier('987654', '2.16.840.1.113883.19.5')
+        assert patient['record_count'] == 2
+        assert len(patient['identifiers']) == 2
+
+    def test_conflicting_identifier_not_merged(self):
+        """Test that twins with different MRNs stay separate patients."""
+        index = PatientIndex()
+        john = index.add_patient({'identifiers': [('111', 'HOSP')], 'last_name': 'SMITH',
+                                  'first_name': 'JOHN', 'date_of_birth': '20200101'})
+        james = index.add_patient({'identifiers': [('222', 'HOSP')], 'last_name': 'SMITH',
+                                   'first_name': 'JAMES', 'date_of_birth': '20200101'})
+
+        assert john != james
+        assert index.find_by_identifier('222', 'HOSP')['first_name'] == 'JAMES'
+        assert index.find_by_identifier('111', 'HOSP')['identifiers'] == [('111', 'HOSP')]
+        assert len(index.find_by_demographics('Smith', 'J', '20200101')) == 2
+
+    def test_merge_indexes_new_demographics(self):
+        """Test that demographics added through an identifier match are searchable."""
+        index = PatientIndex()
+        index.add_patient({'identifiers': [('1', 'H')]})
+        index.add_patient({'identifiers': [('1', 'H')], 'last_name': 'DOE',
+                           'first_name': 'JOHN', 'date_of_birth': '19800101'})
+
+        assert [p['patient_number'] for p in index.find_by_demographics('Doe', 'John', '19800101')] == [0]
+
+    def test_max_patients(self):
+        """Test that the index refuses new patients beyond its budget."""
+        index = PatientIndex(max_patients=1)
+        index.add_hl7_message(SAMPLE_ORU_MESSAGE)
+
+        with pytest.raises(PatientIndexFullError):
+            index.add_hl7_message(SAMPLE_ADT_MESSAGE)
+
+    def test_bulk_load_skips_over_budget(self):
+        """Test that bulk_load counts over-budget records and keeps loading."""
+        index = PatientIndex(max_patients=1)
+
+        stats = index.bulk_load([SAMPLE_ORU_MESSAGE, SAMPLE_ADT_MESSAGE], [SAMPLE_CCD])
+
+        assert stats['hl7_loaded'] == 1
+        assert stats['hl7_skipped'] == 1
+        assert stats['ccd_loaded'] == 1
+        assert len(index) == 1
+
+    def test_save_and_load(self, tmp_path):
+        """Test persisting the index to disk and loading it back."""
+        index = PatientIndex()
+        index.bulk_load([SAMPLE_ORU_MESSAGE, SAMPLE_INTERNATIONAL_MESSAGE])
+        path = str(tmp_path / 'patients.jsonl.gz')
+        index.save(path)
+
+        loaded = PatientIndex.load(path)
+
+        assert len(loaded) == 2
+        assert loaded.find_by_identifier('INT123456', 'HOSPITAL')['first_name'] == 'MARÍA'
+        assert len(loaded.find_by_demographics('Garcia', 'Maria', '19851215')) == 1
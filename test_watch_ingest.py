@@ -0,0 +1,140 @@
+"""
+Unit Tests for Watch-Folder Incremental Ingestion
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import os
+
+import watch_ingest
+from watch_ingest import FolderIngestor
+from sample_HL7_messages import SAMPLE_ORU_MESSAGE, SAMPLE_ADT_MESSAGE, SAMPLE_COMPLEX_MESSAGE
+
+
+def _make_ingestor(tmp_path, records, settle_seconds=3600.0):
+    """Create an ingestor on tmp_path/landing with its checkpoints outside it."""
+    landing = tmp_path / 'landing'
+    landing.mkdir(exist_ok=True)
+    return FolderIngestor(str(landing), records.append,
+                          checkpoint_path=str(tmp_path / 'checkpoints.db'),
+                          settle_seconds=settle_seconds, commit_every=1)
+
+
+class TestFolderIngestor:
+    """Test class for incremental ingestion and checkpoints."""
+
+    def test_growing_file_processed_incrementally(self, tmp_path):
+        """Test that only complete messages are processed until the file settles."""
+        records = []
+        ingestor = _make_ingestor(tmp_path, records)
+        path = tmp_path / 'landing' / 'feed.hl7'
+
+        path.write_text(SAMPLE_ORU_MESSAGE + '\n' + SAMPLE_ADT_MESSAGE)
+        ingestor.poll_once()
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM']
+
+        with open(path, 'a') as feed:
+            feed.write('\n' + SAMPLE_COMPLEX_MESSAGE)
+        ingestor.poll_once()
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM', 'ADT_SYSTEM']
+
+        ingestor.settle_seconds = 0
+        ingestor.poll_once()
+        assert records[-1]['sending_application'] == 'RADIOLOGY'
+        assert ingestor.file_stats()[0]['offset'] == os.path.getsize(path)
+
+    def test_restart_resumes_from_checkpoint(self, tmp_path):
+        """Test that a new ingestor does not re-emit committed messages."""
+        records = []
+        path = tmp_path / 'landing' / 'feed.hl7'
+        first = _make_ingestor(tmp_path, records, settle_seconds=0)
+        path.write_text(SAMPLE_ORU_MESSAGE + '\n')
+        first.poll_once()
+        first.close()
+
+        with open(path, 'a') as feed:
+            feed.write(SAMPLE_ADT_MESSAGE + '\n')
+        second = _make_ingestor(tmp_path, records, settle_seconds=0)
+        second.poll_once()
+
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM', 'ADT_SYSTEM']
+        assert second.file_stats()[0]['messages'] == 2
+
+    def test_truncation_restarts_file(self, tmp_path):
+        """Test that a truncated file is re-read from the start."""
+        records = []
+        ingestor = _make_ingestor(tmp_path, records, settle_seconds=0)
+        path = tmp_path / 'landing' / 'feed.hl7'
+        path.write_text(SAMPLE_ORU_MESSAGE + '\n' + SAMPLE_ADT_MESSAGE + '\n')
+        ingestor.poll_once()
+
+        with open(path, 'w') as feed:
+            feed.write(SAMPLE_COMPLEX_MESSAGE + '\n')
+        ingestor.poll_once()
+
+        assert records[-1]['sending_application'] == 'RADIOLOGY'
+        assert ingestor.file_stats()[0]['truncations'] == 1
+
+    def test_rotation_keeps_offsets(self, tmp_path):
+        """Test that a rotated file is not re-read and the new file is."""
+        records = []
+        ingestor = _make_ingestor(tmp_path, records, settle_seconds=0)
+        landing = tmp_path / 'landing'
+        (landing / 'feed.hl7').write_text(SAMPLE_ORU_MESSAGE + '\n')
+        ingestor.poll_once()
+
+        os.rename(landing / 'feed.hl7', landing / 'feed.1.hl7')
+        (landing / 'feed.hl7').write_text(SAMPLE_ADT_MESSAGE + '\n')
+        ingestor.poll_once()
+
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM', 'ADT_SYSTEM']
+        stats = {os.path.basename(s['path']): s for s in ingestor.file_stats()}
+        assert stats['feed.1.hl7']['messages'] == 1
+        assert stats['feed.hl7']['rotations'] == 1
+
+    def test_reused_inode_not_treated_as_rename(self, tmp_path):
+        """Test that a new file on a recycled inode is read from the start."""
+        records = []
+        ingestor = _make_ingestor(tmp_path, records, settle_seconds=0)
+        landing = tmp_path / 'landing'
+        (landing / 'a.hl7').write_text(SAMPLE_ORU_MESSAGE + '\n')
+        ingestor.poll_once()
+
+        # Delete/create that reuses the inode: same inode, new name, new content
+        os.rename(landing / 'a.hl7', landing / 'b.hl7')
+        (landing / 'b.hl7').write_text(SAMPLE_ADT_MESSAGE + '\n' + SAMPLE_COMPLEX_MESSAGE + '\n')
+        ingestor.poll_once()
+
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM', 'ADT_SYSTEM', 'RADIOLOGY']
+        assert not any('error' in record for record in records)
+
+    def test_rotation_to_unwatched_name_drains_tail(self, tmp_path):
+        """Test that a file rotated to an unwatched name has its tail processed."""
+        records = []
+        ingestor = _make_ingestor(tmp_path, records)
+        landing = tmp_path / 'landing'
+        (landing / 'feed.hl7').write_text(SAMPLE_ORU_MESSAGE + '\n' + SAMPLE_ADT_MESSAGE)
+        ingestor.poll_once()
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM']
+
+        os.rename(landing / 'feed.hl7', landing / 'feed.hl7.1')
+        ingestor.poll_once()
+
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM', 'ADT_SYSTEM']
+        assert records[-1]['source'] == str(landing / 'feed.hl7.1')
+        assert ingestor.file_stats() == []
+
+    def test_backlog_read_in_chunks(self, tmp_path, monkeypatch):
+        """Test that a backlog larger than a read chunk is processed in full."""
+        monkeypatch.setattr(watch_ingest, 'READ_CHUNK_BYTES', 64)
+        records = []
+        ingestor = _make_ingestor(tmp_path, records, settle_seconds=0)
+        path = tmp_path / 'landing' / 'feed.hl7'
+        path.write_text('\n'.join([SAMPLE_ORU_MESSAGE, SAMPLE_ADT_MESSAGE, SAMPLE_COMPLEX_MESSAGE]) + '\n')
+
+        ingestor.poll_once()
+
+        assert [r['sending_application'] for r in records] == ['LAB_SYSTEM', 'ADT_SYSTEM', 'RADIOLOGY']
+        assert len({r['offset'] for r in records}) == 3
+        assert ingestor.file_stats()[0]['offset'] == os.path.getsize(path)
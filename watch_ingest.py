@@ -0,0 +1,488 @@
+"""
+Watch-Folder Incremental Ingestion with Durable Checkpoints
+
+This module watches a landing directory for HL7 and CCD files and processes
+new or growing files incrementally from the last committed byte offset.
+
+- HL7 files are read from their checkpointed offset; complete messages are
+  processed as soon as the next MSH segment arrives, and the last message is
+  processed once the file has not been modified for `settle_seconds`
+- CCD files are processed once, after they have settled
+- Offsets and per-file statistics are kept in a local SQLite checkpoint store
+  and committed in batches, so a restart resumes from the last commit
+- Rotated files (renamed and replaced) are tracked by device/inode, and
+  truncated files are re-read from the start. Because inodes are reused once
+  a file is deleted, a checkpoint only follows a file if its size still
+  covers the offset and a hash of its first bytes still matches. A file
+  rotated to a name the ingestor does not watch (feed.hl7 -> feed.hl7.1)
+  has its unread tail drained before its checkpoint is forgotten
+- New HL7 data is read in chunks of at most `READ_CHUNK_BYTES` (plus any
+  partial message carried between chunks), so memory use does not grow
+  with the backlog
+
+Records are emitted before their checkpoint is committed, so delivery is
+at-least-once: after a crash, anything since the last commit is re-emitted.
+
+Example:
+    >>> ingestor = FolderIngestor('/data/landing', sink=records.append,
+    ...                           checkpoint_path='/var/lib/ingest/checkpoints.db')
+    >>> ingestor.run()
+
+Author: [Your Name]
+Created during Health Informatics Internship at MIHIN
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from hl7_ccd_records import (
+    CCD_EXTENSIONS,
+    HL7_EXTENSIONS,
+    decode_content,
+    scan_ccd,
+    scan_hl7
+)
+
+
+# Start of every HL7 message after the first one in a file
+_MESSAGE_START = re.compile(rb'(?:\r\n|\r|\n)(?=MSH)')
+
+# Leading bytes hashed to confirm a file's identity beyond its inode
+FINGERPRINT_BYTES = 1024
+
+# Largest read of new HL7 data processed at once
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+
+_CHECKPOINT_COLUMNS = ['path', 'device', 'inode', 'offset', 'size', 'mtime',
+                       'fingerprint', 'fingerprint_length',
+                       'messages', 'errors', 'bytes_read', 'rotations', 'truncations',
+                       'first_seen', 'last_processed']
+
+
+def _fingerprint(prefix: bytes) -> str:
+    """Hash the leading bytes of a file."""
+    return hashlib.blake2b(prefix, digest_size=16).hexdigest()
+
+
+class CheckpointStore:
+    """
+    SQLite-backed store of per-file offsets and statistics.
+
+    Updates are buffered in memory and written in a single transaction by
+    commit(), which runs automatically every `commit_every` updates or
+    `commit_interval` seconds.
+    """
+
+    def __init__(self, path: str, commit_every: int = 100, commit_interval: float = 5.0):
+        """
+        Open (or create) a checkpoint store.
+
+        Args:
+            path (str): SQLite database file
+            commit_every (int): Pending updates that trigger a commit
+            commit_interval (float): Seconds after which pending updates are
+                                     committed
+        """
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints ('
+            'path TEXT PRIMARY KEY, device INTEGER, inode INTEGER, offset INTEGER, '
+            'size INTEGER, mtime REAL, fingerprint TEXT, fingerprint_length INTEGER, '
+            'messages INTEGER, errors INTEGER, '
+            'bytes_read INTEGER, rotations INTEGER, truncations INTEGER, '
+            'first_seen REAL, last_processed REAL)'
+        )
+        self._connection.commit()
+
+        self._checkpoints: Dict[str, Dict[str, Any]] = {}
+        for row in self._connection.execute(f"SELECT {', '.join(_CHECKPOINT_COLUMNS)} FROM checkpoints"):
+            checkpoint = dict(zip(_CHECKPOINT_COLUMNS, row))
+            self._checkpoints[checkpoint['path']] = checkpoint
+
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._last_commit = time.monotonic()
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the checkpoint for a file path, including uncommitted updates."""
+        return self._checkpoints.get(path)
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Get all checkpoints keyed by path."""
+        return dict(self._checkpoints)
+
+    def update(self, checkpoint: Dict[str, Any]) -> None:
+        """Buffer a checkpoint update, committing if a batch is due."""
+        self._checkpoints[checkpoint['path']] = checkpoint
+        self._pending[checkpoint['path']] = checkpoint
+        self.commit_if_due()
+
+    def delete(self, path: str) -> None:
+        """Buffer the removal of a checkpoint."""
+        if self._checkpoints.pop(path, None) is not None:
+            self._pending[path] = None
+            self.commit_if_due()
+
+    def commit_if_due(self) -> None:
+        """Commit if enough updates are pending or enough time has passed."""
+        if (len(self._pending) >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
+
+    def commit(self) -> None:
+        """Write all pending updates in one transaction."""
+        if self._pending:
+            with self._connection:
+                for path, checkpoint in self._pending.items():
+                    if checkpoint is None:
+                        self._connection.execute('DELETE FROM checkpoints WHERE path = ?', (path,))
+                    else:
+                        self._connection.execute(
+                            f"INSERT OR REPLACE INTO checkpoints ({', '.join(_CHECKPOINT_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' * len(_CHECKPOINT_COLUMNS))})",
+                            [checkpoint[column] for column in _CHECKPOINT_COLUMNS]
+                        )
+            self._pending = {}
+        self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """Commit pending updates and close the database."""
+        self.commit()
+        self._connection.close()
+
+
+class FolderIngestor:
+    """Incrementally ingests HL7 and CCD files dropped into a directory."""
+
+    def __init__(self, directory: str, sink: Callable[[Dict[str, Any]], None],
+                 checkpoint_path: Optional[str] = None,
+                 required_fields: Optional[List[str]] = None,
+                 poll_interval: float = 1.0, settle_seconds: float = 2.0,
+                 commit_every: int = 100, commit_interval: float = 5.0):
+        """
+        Initialize the ingestor.
+
+        Args:
+            directory (str): Landing directory to watch
+            sink (Callable): Called with every record, in the format
+                             produced by hl7_ccd_records.scan_hl7()/scan_ccd()
+                             plus the byte 'offset' the data started at
+            checkpoint_path (str, optional): Checkpoint database. Defaults to
+                                             '.ingest_checkpoints.db' in the
+                                             watched directory.
+            required_fields (List[str], optional): Required OBX fields
+            poll_interval (float): Seconds between directory scans
+            settle_seconds (float): Seconds a file must be unmodified before
+                                    its final message (or a CCD) is processed
+            commit_every (int): Checkpoint updates per commit
+            commit_interval (float): Maximum seconds between commits
+        """
+        self.directory = directory
+        self.sink = sink
+        self.required_fields = required_fields
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.store = CheckpointStore(
+            checkpoint_path or os.path.join(directory, '.ingest_checkpoints.db'),
+            commit_every=commit_every,
+            commit_interval=commit_interval
+        )
+        self._stop = threading.Event()
+
+    def _list_files(self) -> Tuple[Dict[str, os.stat_result], Dict[tuple, Tuple[str, os.stat_result]]]:
+        """
+        Stat every file in the watched directory.
+
+        Returns:
+            tuple: (HL7/CCD files by path, all other files by (device, inode)),
+                   the latter used to find files rotated to unwatched names
+        """
+        files = {}
+        others = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.lower().endswith(HL7_EXTENSIONS + CCD_EXTENSIONS):
+                    files[entry.path] = stat
+                else:
+                    others[(stat.st_dev, stat.st_ino)] = (entry.path, stat)
+        return files, others
+
+    def poll_once(self) -> Dict[str, int]:
+        """
+        Scan the directory once and process all new data.
+
+        Returns:
+            Dict[str, int]: Counts of files read, records emitted and errors
+                            for this scan
+        """
+        files, others = self._list_files()
+        known = self.store.all()
+        by_inode = {(cp['device'], cp['inode']): cp for cp in known.values()}
+        claimed = set()
+        poll_stats = {'files_read': 0, 'records': 0, 'errors': 0}
+
+        def count(records: Optional[tuple]) -> None:
+            if records is not None:
+                poll_stats['files_read'] += 1
+                poll_stats['records'] += records[0]
+                poll_stats['errors'] += records[1]
+
+        for path, stat in sorted(files.items()):
+            checkpoint = self._resolve_checkpoint(path, stat, known.get(path), by_inode)
+            claimed.add((checkpoint['device'], checkpoint['inode']))
+            count(self._process_file(path, stat, checkpoint))
+
+        # Forget files that no longer exist, first draining any that were
+        # rotated to a name that is not watched
+        for path, checkpoint in known.items():
+            if path in files:
+                continue
+            inode_key = (checkpoint['device'], checkpoint['inode'])
+            if inode_key not in claimed and inode_key in others:
+                rotated_path, stat = others[inode_key]
+                if self._same_file(rotated_path, stat, checkpoint):
+                    count(self._drain_rotated(rotated_path, stat, checkpoint))
+            self.store.delete(path)
+
+        self.store.commit_if_due()
+        return poll_stats
+
+    def _resolve_checkpoint(self, path: str, stat: os.stat_result,
+                            checkpoint: Optional[Dict[str, Any]],
+                            by_inode: Dict[tuple, Dict[str, Any]]) -> Dict[str, Any]:
+        """Find the checkpoint for a file, handling rotation and truncation."""
+        inode_key = (stat.st_dev, stat.st_ino)
+
+        if checkpoint is not None and (checkpoint['device'], checkpoint['inode']) == inode_key:
+            if not self._same_file(path, stat, checkpoint):
+                # Truncated or rewritten in place: start over from the beginning
+                checkpoint = dict(checkpoint, offset=0, fingerprint=None, fingerprint_length=0,
+                                  truncations=checkpoint['truncations'] + 1)
+            return checkpoint
+
+        moved = by_inode.get(inode_key)
+        if moved is not None and moved['path'] != path and self._same_file(path, stat, moved):
+            # Renamed by rotation: keep the offset reached under the old name
+            return dict(moved, path=path)
+
+        rotations = 0
+        if checkpoint is not None:
+            # Same name, different file: the old one was rotated away
+            rotations = checkpoint['rotations'] + 1
+
+        return {
+            'path': path, 'device': stat.st_dev, 'inode': stat.st_ino, 'offset': 0,
+            'size': 0, 'mtime': 0.0, 'fingerprint': None, 'fingerprint_length': 0,
+            'messages': 0, 'errors': 0, 'bytes_read': 0,
+            'rotations': rotations, 'truncations': 0, 'first_seen': time.time(),
+            'last_processed': None
+        }
+
+    @staticmethod
+    def _same_file(path: str, stat: os.stat_result, checkpoint: Dict[str, Any]) -> bool:
+        """
+        Check that a file is still the one a checkpoint was taken from.
+
+        The file must be at least as long as the checkpointed offset and its
+        leading bytes must hash to the stored fingerprint.
+        """
+        if stat.st_size < checkpoint['offset']:
+            return False
+        length = checkpoint['fingerprint_length'] or 0
+        if length == 0:
+            return True
+        try:
+            with open(path, 'rb') as source:
+                prefix = source.read(length)
+        except OSError:
+            return False
+        return len(prefix) == length and _fingerprint(prefix) == checkpoint['fingerprint']
+
+    def _process_file(self, path: str, stat: os.stat_result,
+                      checkpoint: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Process new data in a file and buffer its checkpoint.
+
+        Returns:
+            Optional[tuple]: (records emitted, errors), or None if the file
+                             had nothing ready to process
+        """
+        settled = time.time() - stat.st_mtime >= self.settle_seconds
+        offset = checkpoint['offset']
+        is_ccd = path.lower().endswith(CCD_EXTENSIONS)
+
+        if stat.st_size <= offset or (is_ccd and not settled):
+            # Resolution returns a new dict for new, rotated or truncated files
+            if checkpoint is not self.store.get(path):
+                self.store.update(checkpoint)
+            return None
+
+        records, errors, consumed = self._read_new(path, stat.st_size, offset, is_ccd, settled)
+        if consumed == 0:
+            if checkpoint is not self.store.get(path):
+                self.store.update(checkpoint)
+            return None
+
+        fingerprint = checkpoint['fingerprint']
+        fingerprint_length = checkpoint['fingerprint_length'] or 0
+        if fingerprint_length < FINGERPRINT_BYTES and offset + consumed > fingerprint_length:
+            # Extend the fingerprint over the bytes consumed so far
+            fingerprint_length = min(offset + consumed, FINGERPRINT_BYTES)
+            with open(path, 'rb') as source:
+                prefix = source.read(fingerprint_length)
+            fingerprint = _fingerprint(prefix)
+
+        self.store.update(dict(
+            checkpoint,
+            device=stat.st_dev,
+            inode=stat.st_ino,
+            offset=offset + consumed,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            fingerprint=fingerprint,
+            fingerprint_length=fingerprint_length,
+            messages=checkpoint['messages'] + records,
+            errors=checkpoint['errors'] + errors,
+            bytes_read=checkpoint['bytes_read'] + consumed,
+            last_processed=time.time()
+        ))
+        return records, errors
+
+    def _drain_rotated(self, path: str, stat: os.stat_result,
+                       checkpoint: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Process the unread tail of a file rotated to an unwatched name.
+
+        The writer has moved on to a new file, so the tail is treated as
+        settled. The checkpoint is not kept: the rotated file is not watched.
+
+        Returns:
+            Optional[tuple]: (records emitted, errors), or None if nothing
+                             was left to read
+        """
+        if stat.st_size <= checkpoint['offset']:
+            return None
+        is_ccd = checkpoint['path'].lower().endswith(CCD_EXTENSIONS)
+        records, errors, _ = self._read_new(path, stat.st_size, checkpoint['offset'], is_ccd, True)
+        return records, errors
+
+    def _read_new(self, path: str, size: int, offset: int,
+                  is_ccd: bool, settled: bool) -> Tuple[int, int, int]:
+        """
+        Scan the data between offset and size and emit its records.
+
+        Returns:
+            Tuple[int, int, int]: (records emitted, errors, bytes consumed)
+        """
+        records = errors = consumed = 0
+        with open(path, 'rb') as source:
+            if is_ccd:
+                # A CCD is a single document and has to be parsed whole
+                source.seek(offset)
+                data = source.read(size - offset)
+                runs = [(offset, scan_ccd(decode_content(data), path), len(data))]
+            else:
+                runs = ((start, scan_hl7(decode_content(data), path, self.required_fields), len(data))
+                        for start, data in self._read_messages(source, offset, size, settled))
+
+            for start, run_records, length in runs:
+                for record in run_records:
+                    record['offset'] = start
+                    if 'error' in record:
+                        errors += 1
+                    self.sink(record)
+                records += len(run_records)
+                consumed += length
+        return records, errors, consumed
+
+    def _read_messages(self, source: BinaryIO, offset: int, size: int,
+                       settled: bool) -> Iterator[Tuple[int, bytes]]:
+        """
+        Read new HL7 data in bounded chunks.
+
+        Yields:
+            Tuple[int, bytes]: (file offset, data) runs of complete messages;
+                               a partial message is carried into the next chunk
+        """
+        source.seek(offset)
+        pending = b''
+        remaining = size - offset
+        while remaining > 0:
+            chunk = source.read(min(READ_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            pending += chunk
+            consumed = self._complete_length(pending, settled and remaining == 0)
+            if consumed:
+                yield offset, pending[:consumed]
+                offset += consumed
+                pending = pending[consumed:]
+
+    @staticmethod
+    def _complete_length(data: bytes, settled: bool) -> int:
+        """
+        Number of leading bytes of new HL7 data that hold complete messages.
+
+        A message is complete once the next MSH segment has been written, or
+        when the file has settled.
+        """
+        if settled:
+            return len(data)
+
+        boundaries = [match.start() for match in _MESSAGE_START.finditer(data)]
+        if not boundaries:
+            return 0
+        # Consume through the terminator that precedes the last message start,
+        # so the next read resumes exactly at an MSH segment
+        last_start = boundaries[-1]
+        while last_start < len(data) and data[last_start] in b'\r\n':
+            last_start += 1
+        return last_start
+
+    def file_stats(self) -> List[Dict[str, Any]]:
+        """
+        Get per-file ingestion statistics.
+
+        Returns:
+            List[Dict[str, Any]]: One checkpoint record per tracked file
+        """
+        return [dict(checkpoint) for _, checkpoint in sorted(self.store.all().items())]
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """
+        Poll the directory until stop() is called.
+
+        Args:
+            max_polls (int, optional): Stop after this many scans
+        """
+        polls = 0
+        try:
+            while not self._stop.is_set():
+                self.poll_once()
+                polls += 1
+                if max_polls is not None and polls >= max_polls:
+                    break
+                self._stop.wait(self.poll_interval)
+        finally:
+            self.store.commit()
+
+    def stop(self) -> None:
+        """Stop polling after the current scan."""
+        self._stop.set()
+
+    def close(self) -> None:
+        """Commit checkpoints and close the store."""
+        self.store.close()